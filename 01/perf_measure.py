@@ -0,0 +1,135 @@
+#! .venv/bin/python
+"""Сравнивает пропускную способность `grepiter` до и после `WordMatcher`,
+построчного `grepfile` и `grepfile(..., use_mmap=True)`, а также масштабирование
+`grepparallel` по числу процессов.
+
+Запуск: `python perf_measure.py` (или `inv bench`) из каталога `01`.
+"""
+import os
+import random
+import string
+import tempfile
+import timeit
+from collections.abc import Callable, Iterable, Iterator
+from functools import partial
+from pathlib import Path
+
+from src.read_generator import WordMatcher, grepfile, grepiter, grepparallel
+
+SEED = 42
+N_LINES = 20_000
+WORDS_PER_LINE = 10
+FILTER_SIZES = (10, 1_000, 100_000)
+LEGACY_BUDGET = 2_000_000  # filter words * lines, keeps the naive run short
+FILE_LINES = 500_000
+
+
+def legacy_grepiter(iterable: Iterable[str], wordfilter: list[str]) -> Iterator[str]:
+    """Исходная реализация `grepiter`: фильтр пересобирается на каждой строке."""
+    for line in iterable:
+        if set(map(str.lower, wordfilter)).intersection(line.lower().split()):
+            yield line.rstrip("\n")
+
+
+def random_words(rng: random.Random, n_words: int) -> list[str]:
+    return [
+        "".join(rng.choices(string.ascii_letters, k=rng.randint(3, 10)))
+        for _ in range(n_words)
+    ]
+
+
+def random_lines(rng: random.Random, vocabulary: list[str], n_lines: int) -> list[str]:
+    return [
+        " ".join(rng.choices(vocabulary, k=WORDS_PER_LINE)) + "\n"
+        for _ in range(n_lines)
+    ]
+
+
+def throughput(
+    grep: Callable[[], Iterator[str]], n_bytes: int, repeat: int = 3
+) -> float:
+    """Лучшая пропускная способность `grep` в МБ/с."""
+    best = min(timeit.repeat(lambda: sum(1 for _ in grep()), repeat=repeat, number=1))
+    return n_bytes / best / 1e6
+
+
+def bench_grepiter(rng: random.Random, vocabulary: list[str]):
+    print(
+        f"{'filter words':>12} | {'legacy, MB/s':>12} | {'matcher, MB/s':>13} | speedup"
+    )
+    print("-" * 56)
+    for n_filter in FILTER_SIZES:
+        wordfilter = rng.sample(vocabulary, n_filter // 2) + random_words(
+            rng, n_filter - n_filter // 2
+        )
+        lines = random_lines(rng, vocabulary, N_LINES)
+        legacy_lines = lines[: max(1, min(N_LINES, LEGACY_BUDGET // n_filter))]
+
+        matcher = WordMatcher(wordfilter)
+        new_mbs = throughput(
+            lambda: grepiter(lines, matcher), len("".join(lines).encode())  # noqa: B023
+        )
+        old_mbs = throughput(
+            lambda: legacy_grepiter(legacy_lines, wordfilter),  # noqa: B023
+            len("".join(legacy_lines).encode()),
+        )
+        print(
+            f"{n_filter:>12} | {old_mbs:>12.2f} | {new_mbs:>13.2f} |"
+            f" {new_mbs / old_mbs:>6.1f}x"
+        )
+
+
+def bench_grepfile(rng: random.Random, vocabulary: list[str]):
+    print(f"{'filter words':>12} | {'text, MB/s':>12} | {'mmap, MB/s':>13} | speedup")
+    print("-" * 56)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir, "lines.txt")
+        path.write_text("".join(random_lines(rng, vocabulary, FILE_LINES)))
+        n_bytes = path.stat().st_size
+        for n_filter in FILTER_SIZES:
+            matcher = WordMatcher(
+                rng.sample(vocabulary, 3) + random_words(rng, n_filter)
+            )
+            text_mbs = throughput(
+                lambda: grepfile(path, matcher), n_bytes  # noqa: B023
+            )
+            mmap_mbs = throughput(
+                lambda: grepfile(path, matcher, use_mmap=True), n_bytes  # noqa: B023
+            )
+            print(
+                f"{n_filter:>12} | {text_mbs:>12.2f} | {mmap_mbs:>13.2f} |"
+                f" {mmap_mbs / text_mbs:>6.1f}x"
+            )
+
+
+def bench_grepparallel(rng: random.Random, vocabulary: list[str]):
+    print(f"{'workers':>12} | {'MB/s':>12} | {'speedup':>13}")
+    print("-" * 44)
+    n_cpus = os.cpu_count() or 1
+    workers = sorted({2**i for i in range(n_cpus.bit_length())} | {n_cpus})
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir, "lines.txt")
+        path.write_text("".join(random_lines(rng, vocabulary, 4 * FILE_LINES)))
+        n_bytes = path.stat().st_size
+        matcher = WordMatcher(rng.sample(vocabulary, 3) + random_words(rng, 10))
+        single_mbs = None
+        for n_workers in workers:
+            grep = partial(grepparallel, path, matcher, max_workers=n_workers)
+            mbs = throughput(grep, n_bytes)
+            single_mbs = single_mbs or mbs
+            print(f"{n_workers:>12} | {mbs:>12.2f} | {mbs / single_mbs:>12.1f}x")
+
+
+def main():
+    rng = random.Random(SEED)
+    vocabulary = random_words(rng, 50_000)
+    print("grepiter: legacy vs WordMatcher\n")
+    bench_grepiter(rng, vocabulary)
+    print("\ngrepfile: line by line vs mmap\n")
+    bench_grepfile(rng, vocabulary)
+    print("\ngrepparallel: scaling by processes\n")
+    bench_grepparallel(rng, vocabulary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Потоковая классификация настроения строк: `grepfile` + `predict_message_mood`."""
+import math
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import TextIOBase
+from itertools import islice
+from os import PathLike
+from typing import NamedTuple, TypeVar, get_type_hints
+
+import numpy as np
+import numpy.typing as npt
+
+from src.predict_message_mood import (
+    MOODS,
+    CachedModel,
+    Mood,
+    SomeModel,
+    predict_message_mood_batch,
+)
+from src.read_generator import TextFile, WordFilter, grepfile
+
+BATCH_SIZE = 256  # lines per `predict_message_mood_batch` call
+
+_worker_model: SomeModel | CachedModel | None = None
+
+T = TypeVar("T")
+
+
+def _batched(iterable: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Нарезает `iterable` на списки по `size` элементов (последний -- короче)."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _classify_batch(
+    lines: list[str],
+    model: SomeModel | CachedModel,
+    bad_thresholds: float,
+    good_thresholds: float,
+) -> list[Mood]:
+    codes = predict_message_mood_batch(lines, model, bad_thresholds, good_thresholds)
+    return [MOODS[code] for code in codes]
+
+
+def _init_worker(model: SomeModel | CachedModel) -> None:
+    """Запоминает модель в процессе-работнике, чтобы не пересылать ее с пачками."""
+    global _worker_model  # noqa: PLW0603 pylint: disable=global-statement
+    _worker_model = model
+
+
+def _classify_batch_in_worker(
+    lines: list[str], bad_thresholds: float, good_thresholds: float
+) -> list[Mood]:
+    assert _worker_model is not None
+    return _classify_batch(lines, _worker_model, bad_thresholds, good_thresholds)
+
+
+# pylint: disable-next=too-many-arguments
+def classify_lines(  # noqa: PLR0913
+    lines: Iterable[str],
+    model: SomeModel | CachedModel,
+    bad_thresholds: float = 0.3,
+    good_thresholds: float = 0.8,
+    batch_size: int = BATCH_SIZE,
+    processes: int | None = 0,
+) -> Iterator[tuple[str, Mood]]:
+    """Лениво возвращает пары (строка, вердикт `predict_message_mood`).
+
+    Строки читаются из `lines` и предсказываются пачками по `batch_size`
+    через `predict_message_mood_batch`, так что в памяти одновременно
+    находится не больше одной пачки. Если `processes` > 0, пачки
+    предсказываются в `ProcessPoolExecutor` на стольких процессах (модель
+    должна сериализоваться `pickle`), в работе не больше двух пачек на процесс,
+    порядок строк сохраняется. `processes=None` -- по числу ядер.
+    """
+    if batch_size <= 0:
+        raise ValueError(f"Expected batch_size {batch_size!r} to be positive.")
+    batches = _batched(lines, batch_size)
+    if processes == 0:
+        for batch in batches:
+            yield from zip(
+                batch,
+                _classify_batch(batch, model, bad_thresholds, good_thresholds),
+                strict=True,
+            )
+        return
+
+    n_workers = processes or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_worker, initargs=(model,)
+    )
+    try:
+        pending: deque[tuple[list[str], Future[list[Mood]]]] = deque()
+
+        def submit_next() -> None:
+            batch = next(batches, None)
+            if batch is not None:
+                future = executor.submit(
+                    _classify_batch_in_worker, batch, bad_thresholds, good_thresholds
+                )
+                pending.append((batch, future))
+
+        for _ in range(2 * n_workers):
+            submit_next()
+        while pending:
+            batch, future = pending.popleft()
+            submit_next()
+            yield from zip(batch, future.result(), strict=True)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _readlines(path: str | PathLike[str], encoding: str) -> Iterator[str]:
+    with open(path, encoding=encoding) as file_stream:
+        for line in file_stream:
+            yield line.rstrip("\n")
+
+
+# pylint: disable-next=too-many-arguments
+def classify_file(  # noqa: PLR0913
+    file: str | PathLike[str] | TextFile,
+    model: SomeModel | CachedModel,
+    bad_thresholds: float = 0.3,
+    good_thresholds: float = 0.8,
+    wordfilter: WordFilter | None = None,
+    encoding: str = "utf-8",
+    batch_size: int = BATCH_SIZE,
+    processes: int | None = 0,
+) -> Iterator[tuple[str, Mood]]:
+    """Лениво классифицирует строки `file`'а, как `classify_lines`.
+
+    `file` -- путь или открытый текстовый файл. Если задан `wordfilter`,
+    классифицируются только строки, найденные `grepfile`, иначе все.
+    Строки возвращаются без завершающего перевода строки.
+    """
+    lines: Iterator[str]
+    match file:
+        case _ if wordfilter is not None:
+            lines = grepfile(file, wordfilter, encoding)
+        case TextIOBase():
+            lines = (line.rstrip("\n") for line in file)
+        case str() | PathLike():
+            lines = _readlines(file, encoding)
+        case _:
+            raise TypeError(
+                f"Incorrect file type: {type(file)}. "
+                "The `file` argument only accepts the following types:\n"
+                f"\t   {get_type_hints(classify_file)['file']}"
+            )
+    yield from classify_lines(
+        lines, model, bad_thresholds, good_thresholds, batch_size, processes
+    )
+
+
+class MoodWindow(NamedTuple):
+    """Число вердиктов каждого вида за полуинтервал времени `[start, end)`."""
+
+    start: float
+    end: float
+    counts: dict[Mood, int]
+
+
+class MoodWindowCounter:
+    """Инкрементальные счетчики вердиктов по окнам времени.
+
+    Время делится на шаги по `step` секунд от `origin`, окно длиной `window`
+    состоит из `window / step` последних шагов (`step=None` -- окна
+    не перекрываются). Хранятся только счетчики за шаги текущего окна:
+    при сдвиге окна счетчики ушедшего шага вычитаются из суммы.
+    Окна, в которые не попало ни одного сообщения, не возвращаются.
+    """
+
+    def __init__(
+        self, window: float, step: float | None = None, origin: float = 0.0
+    ) -> None:
+        step = window if step is None else step
+        if not 0 < step <= window:
+            raise ValueError(f"Expected 0 < step {step!r} <= window {window!r}.")
+        n_steps = round(window / step)
+        if not math.isclose(n_steps * step, window):
+            raise ValueError(
+                f"Expected window {window!r} to be a multiple of {step!r}."
+            )
+        self.window, self.step, self.origin = window, step, origin
+        self._n_steps = n_steps
+        self._steps: deque[tuple[int, npt.NDArray[np.int64]]] = deque()
+        self._total = np.zeros(len(MOODS), dtype=np.int64)
+        self._current = np.zeros(len(MOODS), dtype=np.int64)
+        self._index: int | None = None  # index of the step being filled
+
+    def _snapshot(self, last_index: int) -> MoodWindow:
+        return MoodWindow(
+            self.origin + (last_index - self._n_steps + 1) * self.step,
+            self.origin + (last_index + 1) * self.step,
+            dict(zip(MOODS, self._total.tolist(), strict=True)),
+        )
+
+    def _expire(self, last_index: int) -> None:
+        """Вычитает шаги, не попадающие в окно, которое заканчивается `last_index`."""
+        while self._steps and self._steps[0][0] <= last_index - self._n_steps:
+            self._total -= self._steps.popleft()[1]
+
+    def _advance(self, index: int) -> list[MoodWindow]:
+        """Закрывает текущий шаг и возвращает окна, закончившиеся до шага `index`."""
+        closed = []
+        if self._index is not None:
+            self._steps.append((self._index, self._current))
+            self._current = np.zeros(len(MOODS), dtype=np.int64)
+            # ? later windows up to `index` have no messages at all
+            for last_index in range(
+                self._index, min(index, self._index + self._n_steps)
+            ):
+                self._expire(last_index)
+                if self._total.any():
+                    closed.append(self._snapshot(last_index))
+        self._index = index
+        self._expire(index)
+        return closed
+
+    def update(
+        self, timestamps: npt.ArrayLike, codes: npt.ArrayLike
+    ) -> list[MoodWindow]:
+        """Учитывает вердикты `codes` (индексы в `MOODS`) в моменты `timestamps`.
+
+        Моменты не должны убывать. Возвращает окна, закрытые этими сообщениями.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        codes = np.asarray(codes, dtype=np.intp)
+        indices = np.floor((timestamps - self.origin) / self.step).astype(np.int64)
+        if not indices.size:
+            return []
+        if np.any(np.diff(indices) < 0) or (
+            self._index is not None and indices[0] < self._index
+        ):
+            raise ValueError("Expected timestamps in non-decreasing order.")
+
+        closed = []
+        bounds = np.flatnonzero(np.diff(indices)) + 1
+        for group, group_codes in zip(
+            np.split(indices, bounds), np.split(codes, bounds), strict=True
+        ):
+            if group[0] != self._index:
+                closed.extend(self._advance(int(group[0])))
+            counts = np.bincount(group_codes, minlength=len(MOODS))
+            self._current += counts
+            self._total += counts
+        return closed
+
+    def snapshot(self) -> MoodWindow | None:
+        """Окно, которое заканчивается текущим (еще не закрытым) шагом."""
+        if self._index is None:
+            return None
+        return self._snapshot(self._index)
+
+    def flush(self) -> list[MoodWindow]:
+        """Закрывает текущий шаг, возвращает его окно и сбрасывает счетчики."""
+        closed = [] if self._index is None else [self._snapshot(self._index)]
+        self._steps.clear()
+        self._total[:] = 0
+        self._current[:] = 0
+        self._index = None
+        return closed
+
+
+# pylint: disable-next=too-many-arguments
+def mood_windows(  # noqa: PLR0913
+    events: Iterable[tuple[float, str]],
+    model: SomeModel | CachedModel,
+    window: float,
+    step: float | None = None,
+    bad_thresholds: float = 0.3,
+    good_thresholds: float = 0.8,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[MoodWindow]:
+    """Лениво считает вердикты `predict_message_mood` по окнам времени.
+
+    `events` -- пары (момент времени, сообщение) в неубывающем порядке
+    моментов. Сообщения предсказываются пачками по `batch_size` и сразу
+    забываются, окна считаются `MoodWindowCounter(window, step)` и
+    возвращаются по мере закрытия, последнее -- в конце потока.
+    """
+    if batch_size <= 0:
+        raise ValueError(f"Expected batch_size {batch_size!r} to be positive.")
+    counter = MoodWindowCounter(window, step)
+    for batch in _batched(events, batch_size):
+        timestamps, messages = zip(*batch, strict=True)
+        codes = predict_message_mood_batch(
+            messages, model, bad_thresholds, good_thresholds
+        )
+        yield from counter.update(timestamps, codes)
+    yield from counter.flush()
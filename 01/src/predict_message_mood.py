@@ -1,7 +1,20 @@
 """Содержит решение к ДЗ#01.1."""
 import random
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Sequence
 from math import isclose
-from typing import Literal
+from typing import Literal, NamedTuple, TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+
+Mood: TypeAlias = Literal["неуд"] | Literal["отл"] | Literal["норм"]
+
+# ? verdict codes of `predict_message_mood_batch` are indices into this tuple
+MOODS: tuple[Mood, Mood, Mood] = ("неуд", "норм", "отл")
+BAD_CODE, NORM_CODE, GOOD_CODE = range(len(MOODS))
 
 
 class SomeModel:  # pragma: no cover
@@ -12,13 +25,138 @@ class SomeModel:  # pragma: no cover
         rng = random.Random(hash(message))
         return rng.random()
 
+    def predict_batch(self, messages: Sequence[str]) -> list[float]:
+        """Предсказания для нескольких сообщений за один вызов."""
+        return [self.predict(message) for message in messages]
+
+
+class CacheInfo(NamedTuple):
+    """Статистика кеша `CachedModel`, как у `functools.lru_cache`."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class CachedModel:  # pylint: disable=too-many-instance-attributes
+    """Обертка над моделью, запоминающая предсказания по тексту сообщения.
+
+    Подходит для детерминированных моделей вроде `SomeModel`: повторное
+    сообщение берется из кеша без вызова модели. Хранится не больше `maxsize`
+    последних использованных предсказаний (LRU), каждое -- не дольше `ttl`
+    секунд (`None` -- без ограничения). Потокобезопасна; сама модель
+    вызывается вне блокировки, так что одно и то же новое сообщение из двух
+    потоков может быть предсказано дважды.
+
+    >>> model = CachedModel(SomeModel(), maxsize=1_000, ttl=60.0)
+    >>> predict_message_mood("hello", model) == predict_message_mood("hello", model)
+    True
+    >>> model.cache_info()
+    CacheInfo(hits=1, misses=1, maxsize=1000, currsize=1)
+    """
+
+    def __init__(
+        self,
+        model: SomeModel,
+        maxsize: int = 1024,
+        ttl: float | None = None,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError(f"Expected maxsize {maxsize!r} to be positive.")
+        self.model = model
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = 0
+
+    def __reduce__(self) -> tuple[type["CachedModel"], tuple[object, ...]]:
+        """Копия (например, в другом процессе) начинает с пустого кеша."""
+        return type(self), (self.model, self.maxsize, self.ttl, self._timer)
+
+    def _get(self, message: str, now: float) -> float | None:
+        """Достает предсказание из кеша, вызывается под `_lock`."""
+        try:
+            score, expires_at = self._data[message]
+        except KeyError:
+            self._misses += 1
+            return None
+        if expires_at <= now:
+            del self._data[message]
+            self._misses += 1
+            return None
+        self._data.move_to_end(message)
+        self._hits += 1
+        return score
+
+    def _set(self, message: str, score: float, now: float) -> None:
+        """Кладет предсказание в кеш, вызывается под `_lock`."""
+        expires_at = now + self.ttl if self.ttl is not None else float("inf")
+        self._data[message] = (score, expires_at)
+        self._data.move_to_end(message)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def predict(self, message: str) -> float:
+        """`model.predict(message)`, если предсказания нет в кеше."""
+        with self._lock:
+            score = self._get(message, self._timer())
+        if score is None:
+            score = self.model.predict(message)
+            with self._lock:
+                self._set(message, score, self._timer())
+        return score
+
+    def predict_batch(self, messages: Sequence[str]) -> list[float]:
+        """Предсказания для `messages`, модель вызывается только для новых.
+
+        Новые сообщения передаются в `model.predict_batch` одной пачкой
+        (без повторов), если он есть, иначе в `model.predict` по одному.
+        """
+        scores: list[float | None] = []
+        with self._lock:
+            now = self._timer()
+            scores.extend(self._get(message, now) for message in messages)
+        missed = list(
+            dict.fromkeys(m for m, s in zip(messages, scores, strict=True) if s is None)
+        )
+        if missed:
+            predict_batch = getattr(self.model, "predict_batch", None)
+            if predict_batch is not None:
+                predicted = dict(zip(missed, predict_batch(missed), strict=True))
+            else:
+                predicted = {message: self.model.predict(message) for message in missed}
+            with self._lock:
+                now = self._timer()
+                for message, score in predicted.items():
+                    self._set(message, score, now)
+            scores = [
+                predicted[m] if s is None else s
+                for m, s in zip(messages, scores, strict=True)
+            ]
+        return scores  # type: ignore[return-value]
+
+    def cache_info(self) -> CacheInfo:
+        """Число попаданий, промахов, максимальный и текущий размер кеша."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._data))
+
+    def cache_clear(self) -> None:
+        """Очищает кеш и статистику."""
+        with self._lock:
+            self._data.clear()
+            self._hits = self._misses = 0
+
 
 def predict_message_mood(
     message: str,
-    model: SomeModel,
+    model: SomeModel | CachedModel,
     bad_thresholds: float = 0.3,
     good_thresholds: float = 0.8,
-) -> Literal["неуд"] | Literal["отл"] | Literal["норм"]:
+) -> Mood:
     """Принимает на вход строку, экземпляр модели `SomeModel` и пороги хорошести.
 
     Returns
@@ -33,3 +171,53 @@ def predict_message_mood(
     if verdict > good_thresholds or isclose(verdict, good_thresholds):
         return "отл"
     return "норм"
+
+
+def _isclose(
+    values: npt.NDArray[np.float64], threshold: float, rel_tol: float = 1e-09
+) -> npt.NDArray[np.bool_]:
+    """Поэлементный `math.isclose` (в отличие от `np.isclose` он симметричен)."""
+    return np.abs(values - threshold) <= rel_tol * np.maximum(
+        np.abs(values), abs(threshold)
+    )
+
+
+def classify_scores(
+    scores: npt.ArrayLike,
+    bad_thresholds: float = 0.3,
+    good_thresholds: float = 0.8,
+) -> npt.NDArray[np.int8]:
+    """Переводит предсказания модели в коды вердиктов (индексы в `MOODS`).
+
+    Пороги сравниваются так же, как в `predict_message_mood`.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    codes = np.full(scores.shape, NORM_CODE, dtype=np.int8)
+    codes[(scores > good_thresholds) | _isclose(scores, good_thresholds)] = GOOD_CODE
+    codes[(scores < bad_thresholds) | _isclose(scores, bad_thresholds)] = BAD_CODE
+    return codes
+
+
+def predict_message_mood_batch(
+    messages: Iterable[str],
+    model: SomeModel | CachedModel,
+    bad_thresholds: float = 0.3,
+    good_thresholds: float = 0.8,
+) -> npt.NDArray[np.int8]:
+    """Как `predict_message_mood`, но сразу для всех `messages`.
+
+    Если у модели есть `predict_batch`, он вызывается один раз на всю пачку,
+    иначе `predict` вызывается для каждого сообщения.
+
+    Returns
+    -------
+    Массив `np.int8` кодов вердиктов: `MOODS[code]` -- вердикт для сообщения.
+    """
+    predict_batch = getattr(model, "predict_batch", None)
+    if predict_batch is not None:
+        if not isinstance(messages, Sequence):
+            messages = list(messages)
+        scores = np.asarray(predict_batch(messages), dtype=np.float64)
+    else:
+        scores = np.fromiter(map(model.predict, messages), dtype=np.float64)
+    return classify_scores(scores, bad_thresholds, good_thresholds)
@@ -1,36 +1,456 @@
 """Содержит решение к ДЗ#01.1."""
+import glob
+import gzip
+import math
+import mmap
+import os
+import threading
+from collections import deque
 from collections.abc import Iterable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from io import TextIOBase
 from os import PathLike
-from typing import TypeAlias, get_type_hints
+from pathlib import Path
+from queue import Full, Queue
+from typing import AnyStr, BinaryIO, TypeAlias, get_type_hints
+
+try:
+    import zstandard
+except ImportError:  # zstd inputs are supported only if zstandard is installed
+    zstandard = None  # type: ignore[assignment]
 
 TextFile: TypeAlias = TextIOBase
+PathsOrGlob: TypeAlias = str | PathLike[str] | Iterable[str | PathLike[str]]
+
+MMAP_CHUNK_SIZE = 1 << 20  # bytes
+MAX_SHARD_SIZE = 64 << 20  # bytes
+READ_AHEAD_BLOCKS = 4  # per prefetched file
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+SUBSTRING_SEARCH_LIMIT = 32  # filters up to this size are searched word by word
+
+_ASCII = bytes(range(128))
+# ? lowercase ASCII letters and turn the separators that `str.split` knows
+# ? but `bytes.split` doesn't (\x1c-\x1f) into spaces, in one `translate` pass
+_ASCII_LOWER = _ASCII.lower().translate(
+    bytes.maketrans(b"\x1c\x1d\x1e\x1f", b"    ")
+) + bytes(range(128, 256))
+
+
+class WordMatcher:
+    """Скомпилированный фильтр слов для `grepiter`/`grepfile`.
+
+    Множество искомых слов приводится к нижнему регистру один раз при создании,
+    после чего объект можно переиспользовать для любого числа строк и вызовов.
+    Проверка строки стоит O(k), где k -- число слов в строке, и не зависит
+    от размера фильтра.
+
+    >>> matcher = WordMatcher(["Test", "can"])
+    >>> matcher.match("why writing tests CAN be challenging.")
+    True
+    """
+
+    __slots__ = ("words", "_needles", "_ascii_needles")
+
+    def __init__(self, wordfilter: Iterable[str]) -> None:
+        self.words: frozenset[str] = frozenset(map(str.lower, wordfilter))
+        # ? only words that can be a whole token of `str.split()` may ever match
+        self._needles = frozenset(w for w in self.words if w.split() == [w])
+        self._ascii_needles = frozenset(
+            w.encode("ascii") for w in self._needles if w.isascii()
+        )
+
+    def match(self, line: str) -> bool:
+        """Есть ли в строке `line` хотя бы одно слово фильтра целиком."""
+        return not self.words.isdisjoint(line.lower().split())
+
+    def grepbytes(
+        self, chunk: bytes, encoding: str = "utf-8"
+    ) -> Iterator[tuple[int, str]]:
+        """Ищет слова в байтах `chunk` из целых строк, разделенных "\\n".
+
+        Возвращает пары (номер строки в `chunk` с нуля, строка).
+        Куски из одних ascii-символов просматриваются прямо в байтах,
+        остальные декодируются целиком за раз. Построчно разбираются только
+        строки, где нашлось слово. Кодировка должна быть совместима с ascii.
+        """
+        if chunk.isascii():  # ? fast path: ascii bytes are the text itself
+            haystack = chunk.translate(_ASCII_LOWER)
+            for index, start in _matched_lines(haystack, self._ascii_needles):
+                end = chunk.find(b"\n", start)
+                line = chunk[start : None if end == -1 else end].decode(encoding)
+                yield index, line.removesuffix("\r")
+            return
+
+        text = chunk.decode(encoding)
+        lowered = text.lower()
+        if len(lowered) != len(text):  # ? e.g. "İ".lower() == "i̇", offsets differ
+            for index, line in enumerate(text.split("\n")):
+                if self.match(line):
+                    yield index, line.removesuffix("\r")
+            return
+        for index, start in _matched_lines(lowered, self._needles):
+            end = text.find("\n", start)
+            yield index, text[start : None if end == -1 else end].removesuffix("\r")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({sorted(self.words)!r})"
+
+
+WordFilter: TypeAlias = list[str] | WordMatcher
+
 
+def compile_wordfilter(wordfilter: WordFilter) -> WordMatcher:
+    """Возвращает `WordMatcher` для `wordfilter`, уже скомпилированный не трогает."""
+    if isinstance(wordfilter, WordMatcher):
+        return wordfilter
+    return WordMatcher(wordfilter)
 
-def grepiter(iterable: Iterable[str], wordfilter: list[str]) -> Iterator[str]:
+
+def grepiter(iterable: Iterable[str], wordfilter: WordFilter) -> Iterator[str]:
     """Итеративно ищет список слов в каждом элементе `iterable`.
 
     Перебирает строки в итераторе и возвращает только
     те из них (строку целиком), где встретилось хотя бы одно из слов для поиска.
     Поиск выполняется по полному совпадению слова без учета регистра.
+    Вместо списка слов можно передать заранее собранный `WordMatcher`.
     """
+    match_line = compile_wordfilter(wordfilter).match
     for line in iterable:
-        if set(map(str.lower, wordfilter)).intersection(line.lower().split()):
+        if match_line(line):
             yield line.rstrip("\n")
 
 
+def _matched_lines(
+    haystack: AnyStr, needles: frozenset[AnyStr]
+) -> list[tuple[int, int]]:
+    """Строки `haystack` (уже в нижнем регистре), где есть слово из `needles`.
+
+    Возвращает пары (номер строки, смещение ее начала). Небольшие фильтры
+    ищутся подстрокой по всему куску, и построчно проверяются только строки
+    с найденной подстрокой. Большие -- одним проходом по строкам.
+    """
+    newline = b"\n" if isinstance(haystack, bytes) else "\n"
+    matched: list[tuple[int, int]] = []
+    if len(needles) > SUBSTRING_SEARCH_LIMIT:
+        line_start = 0
+        for index, line in enumerate(haystack.split(newline)):
+            if not needles.isdisjoint(line.split()):
+                matched.append((index, line_start))
+            line_start += len(line) + 1
+        return matched
+
+    found: set[int] = set()
+    for needle in needles:
+        pos = haystack.find(needle)
+        while pos != -1:
+            line_start = haystack.rfind(newline, 0, pos) + 1
+            line_end = haystack.find(newline, pos)
+            if line_end == -1:
+                line_end = len(haystack)
+            if needle in haystack[line_start:line_end].split():
+                found.add(line_start)
+            pos = haystack.find(needle, line_end)
+
+    index = prev_start = 0
+    for line_start in sorted(found):
+        index += haystack.count(newline, prev_start, line_start)
+        matched.append((index, line_start))
+        prev_start = line_start
+    return matched
+
+
+def _line_spans(
+    buffer: mmap.mmap | bytes, size: int, span: tuple[int, int] | None = None
+) -> Iterator[tuple[int, int]]:
+    """Делит `buffer` (или его часть `span`) на куски примерно по `size` байт.
+
+    Каждый кусок заканчивается переводом строки (или концом `span`), так что
+    строки не разрываются между кусками. Начало `span` должно быть началом строки.
+    """
+    start, end = (0, len(buffer)) if span is None else span
+    while start < end:
+        chunk_end = buffer.find(b"\n", min(start + size, end - 1), end) + 1 or end
+        yield start, chunk_end
+        start = chunk_end
+
+
+def _grepbuffer(
+    buffer: mmap.mmap | bytes,
+    matcher: WordMatcher,
+    encoding: str,
+    span: tuple[int, int] | None = None,
+    chunk_size: int = MMAP_CHUNK_SIZE,
+) -> Iterator[str]:
+    """Перебирает `buffer` кусками по `chunk_size`, выровненными по строкам."""
+    for start, end in _line_spans(buffer, chunk_size, span):
+        for _, line in matcher.grepbytes(buffer[start:end], encoding):
+            yield line
+
+
+def _check_encoding(encoding: str) -> None:
+    if _ASCII.decode(encoding, errors="replace") != _ASCII.decode("ascii"):
+        raise ValueError(f"Encoding {encoding!r} is not ascii-compatible.")
+
+
+def grepmmap(
+    path: str | PathLike[str],
+    wordfilter: WordFilter,
+    encoding: str = "utf-8",
+    chunk_size: int = MMAP_CHUNK_SIZE,
+) -> Iterator[str]:
+    """Ищет список слов в файле по `path`, отображая его в память (`mmap`).
+
+    Семантика та же, что у `grepfile`, но файл читается кусками по `chunk_size`
+    байт: куски без единого ascii-символа старше 127 просматриваются прямо
+    в байтах, остальные декодируются целиком за раз, а построчно разбираются
+    только строки, где нашлось слово. Память не зависит от размера файла.
+    Строки разделяются только по "\\n" (и "\\r\\n"), кодировка должна
+    быть совместима с ascii (utf-8, cp1251, koi8-r...).
+    """
+    _check_encoding(encoding)
+    matcher = compile_wordfilter(wordfilter)
+    with open(path, "rb") as file_stream:
+        if file_stream.seek(0, 2) == 0:  # ? empty files can't be mmapped
+            return
+        with mmap.mmap(file_stream.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                buffer.madvise(mmap.MADV_SEQUENTIAL)
+            yield from _grepbuffer(buffer, matcher, encoding, chunk_size=chunk_size)
+
+
+def _grepshard(
+    path: str | PathLike[str],
+    matcher: WordMatcher,
+    encoding: str,
+    span: tuple[int, int],
+) -> list[str]:
+    """Ищет слова в байтах `span` файла `path`, выполняется в процессе-работнике."""
+    with open(path, "rb") as file_stream, mmap.mmap(
+        file_stream.fileno(), 0, access=mmap.ACCESS_READ
+    ) as buffer:
+        return list(_grepbuffer(buffer, matcher, encoding, span))
+
+
+def _shard_spans(
+    path: str | PathLike[str], n_workers: int, shard_size: int | None
+) -> list[tuple[int, int]]:
+    with open(path, "rb") as file_stream:
+        file_size = file_stream.seek(0, 2)
+        if file_size == 0:  # ? empty files can't be mmapped
+            return []
+        if shard_size is None:  # ? a few shards per worker to even out the load
+            shard_size = math.ceil(file_size / (4 * n_workers))
+            shard_size = min(max(shard_size, MMAP_CHUNK_SIZE), MAX_SHARD_SIZE)
+        with mmap.mmap(file_stream.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return list(_line_spans(buffer, shard_size))
+
+
+# pylint: disable-next=too-many-arguments
+def grepparallel(  # noqa: PLR0913
+    path: str | PathLike[str],
+    wordfilter: WordFilter,
+    encoding: str = "utf-8",
+    max_workers: int | None = None,
+    ordered: bool = True,
+    shard_size: int | None = None,
+) -> Iterator[str]:
+    """Ищет список слов в файле по `path` несколькими процессами.
+
+    Файл делится на куски по `shard_size` байт, выровненные по строкам, и каждый
+    кусок просматривается как в `grepmmap` в `ProcessPoolExecutor`
+    на `max_workers` процессах. Если `ordered`, строки возвращаются в порядке
+    файла, иначе -- по мере готовности кусков. В работе одновременно не больше
+    двух кусков на процесс, так что память ограничена найденными в них строками.
+    """
+    _check_encoding(encoding)
+    matcher = compile_wordfilter(wordfilter)
+    n_workers = max_workers or os.cpu_count() or 1
+    spans = iter(_shard_spans(path, n_workers, shard_size))
+
+    executor = ProcessPoolExecutor(max_workers=n_workers)
+    try:
+        pending: deque[Future[list[str]]] = deque()
+
+        def submit_next() -> None:
+            span = next(spans, None)
+            if span is not None:
+                pending.append(
+                    executor.submit(_grepshard, path, matcher, encoding, span)
+                )
+
+        for _ in range(2 * n_workers):
+            submit_next()
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done = list(wait(pending, return_when=FIRST_COMPLETED).done)
+                for future in done:
+                    pending.remove(future)
+            for future in done:
+                submit_next()
+                yield from future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _open_binary(path: Path) -> BinaryIO:
+    """Открывает файл на чтение байтов, распаковывая gzip и zstd по сигнатуре."""
+    with open(path, "rb") as file_stream:
+        magic = file_stream.read(len(ZSTD_MAGIC))
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(path, "rb")  # type: ignore[return-value]
+    if magic == ZSTD_MAGIC:
+        if zstandard is None:
+            raise ModuleNotFoundError(
+                f"Install `zstandard` to read zstd-compressed file {path}."
+            )
+        return zstandard.ZstdDecompressor().stream_reader(  # type: ignore
+            open(path, "rb"), closefd=True
+        )
+    return open(path, "rb")
+
+
+def _expand_paths(paths_or_glob: PathsOrGlob) -> Iterator[Path]:
+    if isinstance(paths_or_glob, str | PathLike):
+        paths_or_glob = [paths_or_glob]
+    for item in paths_or_glob:
+        path = Path(item)
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob("*") if p.is_file())
+        elif glob.has_magic(str(item)):  # type: ignore[attr-defined]
+            found = map(Path, glob.glob(str(item), recursive=True))
+            yield from sorted(p for p in found if p.is_file())
+        else:
+            yield path
+
+
+def _read_blocks(
+    path: Path,
+    blocks: Queue[bytes | BaseException | None],
+    stop: threading.Event,
+    block_size: int,
+) -> None:
+    """Читает `path` блоками в `blocks`, пока не дочитает или не будет `stop`.
+
+    В конце кладет `None`, а при ошибке -- само исключение.
+    """
+
+    def put(item: bytes | BaseException | None) -> bool:
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    try:
+        with _open_binary(path) as file_stream:
+            while block := file_stream.read(block_size):
+                if not put(block):
+                    return
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        put(err)
+    else:
+        put(None)
+
+
+def _grepblocks(
+    blocks: Queue[bytes | BaseException | None], matcher: WordMatcher, encoding: str
+) -> Iterator[tuple[int, str]]:
+    """Собирает блоки в куски из целых строк и ищет в них слова."""
+    n_lines, tail = 0, b""
+    while True:
+        block = blocks.get()
+        if isinstance(block, BaseException):
+            raise block
+        if block is None:
+            chunk, tail = tail, b""
+        else:
+            buffer = tail + block
+            cut = buffer.rfind(b"\n") + 1
+            chunk, tail = buffer[:cut], buffer[cut:]
+        for index, line in matcher.grepbytes(chunk, encoding):
+            yield n_lines + index + 1, line
+        if block is None:
+            return
+        n_lines += chunk.count(b"\n")
+
+
+def grepfiles(
+    paths_or_glob: PathsOrGlob,
+    wordfilter: WordFilter,
+    encoding: str = "utf-8",
+    prefetch: int = 4,
+    block_size: int = MMAP_CHUNK_SIZE,
+) -> Iterator[tuple[Path, int, str]]:
+    """Ищет список слов во всех файлах `paths_or_glob`, читая их наперед.
+
+    `paths_or_glob` -- путь, glob-шаблон (`"logs/**/*.log*"`), каталог
+    (берутся все файлы в нем рекурсивно) или их список. Возвращает тройки
+    (путь, номер строки с единицы, строка) в порядке файлов.
+    Пока просматривается один файл, до `prefetch` следующих читаются
+    в пуле потоков блоками по `block_size` байт, не больше
+    `READ_AHEAD_BLOCKS` блоков на файл. Файлы, сжатые gzip или zstd
+    (нужен пакет `zstandard`), распаковываются по сигнатуре.
+    Требования к кодировке те же, что у `grepmmap`.
+    """
+    _check_encoding(encoding)
+    matcher = compile_wordfilter(wordfilter)
+    paths = _expand_paths(paths_or_glob)
+    stop = threading.Event()
+
+    executor = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix="grepfiles")
+    try:
+        window: deque[tuple[Path, Queue[bytes | BaseException | None]]] = deque()
+
+        def submit_next() -> None:
+            path = next(paths, None)
+            if path is not None:
+                blocks: Queue[bytes | BaseException | None] = Queue(
+                    maxsize=READ_AHEAD_BLOCKS
+                )
+                executor.submit(_read_blocks, path, blocks, stop, block_size)
+                window.append((path, blocks))
+
+        for _ in range(prefetch):
+            submit_next()
+        while window:
+            path, blocks = window.popleft()
+            submit_next()
+            for line_no, line in _grepblocks(blocks, matcher, encoding):
+                yield path, line_no, line
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
 def grepfile(
-    file: str | PathLike[str] | TextFile, wordfilter: list[str], encoding: str = "utf-8"
+    file: str | PathLike[str] | TextFile,
+    wordfilter: WordFilter,
+    encoding: str = "utf-8",
+    use_mmap: bool = False,
 ) -> Iterator[str]:
     """Итеративно ищет список слов в каждой строке `file`'а.
 
     Перебирает строки в файле и возвращает только
     те из них (строку целиком), где встретилось хотя бы одно из слов для поиска.
     Поиск выполняется по полному совпадению слова без учета регистра.
+    Если `use_mmap` и `file` -- путь, то файл просматривается через `grepmmap`.
     """
     match file:
         case TextIOBase():  # if opened file, then pass directly to grepiter
             yield from grepiter(file, wordfilter)
+        case str() | PathLike() if use_mmap:
+            yield from grepmmap(file, wordfilter, encoding)
         case str() | PathLike():  # if path to file, then we open it
             with open(file, encoding=encoding) as file_stream:
                 yield from grepiter(file_stream, wordfilter)
@@ -66,10 +66,16 @@ def test(c: Context, cov=False):
         c.run(f"{c.python_bin_path}pytest", pty=True)
 
 
+@task
+def bench(c: Context):
+    c.run(f"{c.python_bin_path}python perf_measure.py", pty=True)
+
+
 namespace = Collection(
     clean,
     lint,
     test,
+    bench,
 )
 namespace.configure(
     {"python_bin_path": get_python_bin_path(), "lint_paths": ["tests", "src"]}
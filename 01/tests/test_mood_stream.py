@@ -0,0 +1,232 @@
+"""Содержит тесты потоковой классификации настроения строк."""
+# pylint: disable=redefined-outer-name
+
+import io
+import math
+import pickle
+from pathlib import Path
+from random import Random
+
+import pytest
+from pytest_mock import MockerFixture
+
+from src.mood_stream import (
+    MoodWindow,
+    MoodWindowCounter,
+    classify_file,
+    classify_lines,
+    mood_windows,
+)
+from src.predict_message_mood import MOODS, CachedModel, SomeModel, predict_message_mood
+
+SEED = 42
+LINES = [f"message {i} {'cat' if i % 3 == 0 else 'dog'}" for i in range(50)]
+
+
+@pytest.fixture()
+def model() -> SomeModel:
+    """Fixture of model to test."""
+    return SomeModel()
+
+
+@pytest.fixture()
+def text_path(tmp_path: Path) -> Path:
+    """Файл со строками `LINES`."""
+    path = tmp_path / "messages.txt"
+    path.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    return path
+
+
+def expected(lines: list[str], model: SomeModel) -> list[tuple[str, str]]:
+    """Вердикты, посчитанные поштучно через `predict_message_mood`."""
+    return [(line, predict_message_mood(line, model)) for line in lines]
+
+
+class TestClassifyLines:
+    """Тесты `classify_lines`."""
+
+    @pytest.mark.parametrize("batch_size", [1, 7, 50, 256])
+    def test_same_as_single(self, model: SomeModel, batch_size: int):
+        """Результат не зависит от размера пачки."""
+        result = list(classify_lines(LINES, model, batch_size=batch_size))
+        assert result == expected(LINES, model)
+
+    def test_lazy_batches(self, model: SomeModel, mocker: MockerFixture):
+        """Строки читаются и предсказываются пачками по мере надобности."""
+        batch = mocker.spy(model, "predict_batch")
+        lines = iter(LINES)
+        result = classify_lines(lines, model, batch_size=10)
+        assert next(result) == expected(LINES[:1], model)[0]
+        batch.assert_called_once_with(LINES[:10])
+        assert next(lines) == LINES[10]
+
+    def test_thresholds(self, model: SomeModel):
+        """Пороги передаются в предсказание."""
+        result = classify_lines(LINES, model, bad_thresholds=0.5, good_thresholds=0.6)
+        assert list(result) == [
+            (line, predict_message_mood(line, model, 0.5, 0.6)) for line in LINES
+        ]
+
+    @pytest.mark.parametrize("batch_size", [0, -1])
+    def test_bad_batch_size(self, model: SomeModel, batch_size: int):
+        """Размер пачки должен быть положительным."""
+        with pytest.raises(ValueError, match="batch_size"):
+            next(classify_lines(LINES, model, batch_size=batch_size))
+
+    @pytest.mark.parametrize("processes", [1, 2, None])
+    def test_processes(self, model: SomeModel, processes: int | None):
+        """Пачки в пуле процессов возвращаются в исходном порядке."""
+        result = list(classify_lines(LINES, model, batch_size=4, processes=processes))
+        assert result == expected(LINES, model)
+
+    def test_processes_cached_model(self, model: SomeModel):
+        """`CachedModel` передается в процессы с пустым кешем."""
+        cached = CachedModel(model, maxsize=16, ttl=5.0)
+        cached.predict(LINES[0])
+        copy = pickle.loads(pickle.dumps(cached))
+        assert (copy.maxsize, copy.ttl, copy.cache_info().currsize) == (16, 5.0, 0)
+        result = list(classify_lines(LINES, cached, batch_size=8, processes=2))
+        assert result == expected(LINES, model)
+
+    def test_early_close(self, model: SomeModel):
+        """Незавершенный генератор останавливает пул процессов."""
+        result = classify_lines(iter(LINES * 100), model, batch_size=4, processes=2)
+        assert next(result) == expected(LINES[:1], model)[0]
+        del result
+
+
+class TestClassifyFile:
+    """Тесты `classify_file`."""
+
+    def test_path(self, text_path: Path, model: SomeModel):
+        """Путь к файлу: все строки без переводов строки."""
+        assert list(classify_file(text_path, model)) == expected(LINES, model)
+        assert list(classify_file(str(text_path), model, batch_size=3)) == expected(
+            LINES, model
+        )
+
+    def test_stream(self, model: SomeModel):
+        """Открытый текстовый файл."""
+        stream = io.StringIO("\n".join(LINES))
+        assert list(classify_file(stream, model)) == expected(LINES, model)
+
+    def test_wordfilter(self, text_path: Path, model: SomeModel):
+        """С `wordfilter` классифицируются только найденные строки."""
+        cats = [line for line in LINES if "cat" in line]
+        assert list(classify_file(text_path, model, wordfilter=["CAT"])) == expected(
+            cats, model
+        )
+
+    def test_incorrect_type(self, model: SomeModel):
+        """Неподдерживаемый тип `file`."""
+        with pytest.raises(TypeError, match="Incorrect file type"):
+            next(classify_file(42, model))  # type: ignore[arg-type]
+
+
+def naive_windows(
+    events: list[tuple[float, str]], model: SomeModel, window: float, step: float
+) -> list[MoodWindow]:
+    """Окна, посчитанные перебором всех сообщений для каждого окна."""
+    verdicts = [(ts, predict_message_mood(m, model)) for ts, m in events]
+    first = math.floor(events[0][0] / step)
+    last = math.floor(events[-1][0] / step)
+    result = []
+    for index in range(first, last + 1):
+        start, end = (index + 1) * step - window, (index + 1) * step
+        counts = dict.fromkeys(MOODS, 0)
+        for ts, verdict in verdicts:
+            if start <= ts < end:
+                counts[verdict] += 1
+        if any(counts.values()):
+            result.append(MoodWindow(start, end, counts))
+    return result
+
+
+class TestMoodWindows:
+    """Тесты `MoodWindowCounter` и `mood_windows`."""
+
+    @pytest.fixture()
+    def events(self) -> list[tuple[float, str]]:
+        """Сообщения со случайными промежутками, в том числе длинными."""
+        rng = Random(SEED)
+        timestamp, events = 0.0, []
+        for i in range(500):
+            timestamp += rng.choice([0.0, 0.1, 0.5, 2.0, 30.0])
+            events.append((timestamp, f"message {i}"))
+        return events
+
+    @pytest.mark.parametrize(
+        "window_step", [(1.0, None), (5.0, None), (5.0, 1.0), (3.0, 0.5)]
+    )
+    @pytest.mark.parametrize("batch_size", [1, 64])
+    def test_same_as_naive(
+        self,
+        events: list[tuple[float, str]],
+        model: SomeModel,
+        window_step: tuple[float, float | None],
+        batch_size: int,
+    ):
+        """Окна совпадают с подсчетом перебором."""
+        window, step = window_step
+        result = list(mood_windows(events, model, window, step, batch_size=batch_size))
+        assert result == naive_windows(events, model, window, step or window)
+
+    def test_tumbling(self):
+        """Неперекрывающиеся окна, пустые окна пропускаются."""
+        counter = MoodWindowCounter(10.0)
+        assert counter.update([1.0, 2.0, 9.9], [0, 2, 2]) == []
+        assert counter.snapshot() == MoodWindow(
+            0.0, 10.0, {"неуд": 1, "норм": 0, "отл": 2}
+        )
+        assert counter.update([35.0], [1]) == [
+            MoodWindow(0.0, 10.0, {"неуд": 1, "норм": 0, "отл": 2})
+        ]
+        assert counter.flush() == [
+            MoodWindow(30.0, 40.0, {"неуд": 0, "норм": 1, "отл": 0})
+        ]
+        assert counter.snapshot() is None
+        assert counter.flush() == []
+
+    def test_sliding(self):
+        """Скользящее окно вычитает ушедшие шаги."""
+        counter = MoodWindowCounter(2.0, step=1.0)
+        assert counter.update([0.5, 1.5], [0, 1]) == [
+            MoodWindow(-1.0, 1.0, {"неуд": 1, "норм": 0, "отл": 0})
+        ]
+        assert counter.update([2.5], [2]) == [
+            MoodWindow(0.0, 2.0, {"неуд": 1, "норм": 1, "отл": 0})
+        ]
+        assert counter.snapshot() == MoodWindow(
+            1.0, 3.0, {"неуд": 0, "норм": 1, "отл": 1}
+        )
+
+    def test_empty_update(self):
+        """Пустая пачка ничего не закрывает и не меняет счетчики."""
+        counter = MoodWindowCounter(1.0)
+        assert counter.update([], []) == []
+        counter.update([0.5], [0])
+        assert counter.update([], []) == []
+        assert counter.flush() == [
+            MoodWindow(0.0, 1.0, {"неуд": 1, "норм": 0, "отл": 0})
+        ]
+
+    def test_out_of_order(self):
+        """Убывающие моменты времени -- ошибка."""
+        counter = MoodWindowCounter(1.0)
+        counter.update([5.0], [0])
+        with pytest.raises(ValueError, match="non-decreasing"):
+            counter.update([4.0], [0])
+        with pytest.raises(ValueError, match="non-decreasing"):
+            counter.update([6.0, 5.5], [0, 0])
+
+    @pytest.mark.parametrize(
+        ("window", "step"), [(1.0, 0.0), (1.0, 2.0), (1.0, 0.3), (-1.0, None)]
+    )
+    def test_bad_window(self, window: float, step: float | None):
+        """Шаг должен быть положительным и укладываться в окно целое число раз."""
+        with pytest.raises(ValueError, match="Expected"):
+            MoodWindowCounter(window, step)
+
+    def test_empty(self, model: SomeModel):
+        """Пустой поток -- нет окон."""
+        assert not list(mood_windows([], model, 1.0))
@@ -1,12 +1,25 @@
 """Содержит тесты решения ДЗ#01.1."""
 # pylint: disable=redefined-outer-name
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import NewType
 
+import numpy as np
 import pytest
 from pytest_mock import MockerFixture
 
-from src.predict_message_mood import SomeModel, predict_message_mood
+from src.predict_message_mood import (
+    BAD_CODE,
+    GOOD_CODE,
+    MOODS,
+    NORM_CODE,
+    CachedModel,
+    CacheInfo,
+    SomeModel,
+    classify_scores,
+    predict_message_mood,
+    predict_message_mood_batch,
+)
 
 MockedSomeModel = NewType("MockedSomeModel", SomeModel)
 
@@ -103,3 +116,149 @@ def test_threshold_tweaks(
         predict_message_mood("lIpSuM", model, new_bad_threshold, new_good_threshold)
         == out
     )
+
+
+class TestBatch:
+    """Тесты пакетного предсказания `predict_message_mood_batch`."""
+
+    SCORES = (
+        BAD_THRESHOLD - 0.1,
+        BAD_THRESHOLD,
+        BAD_THRESHOLD + 1e-16,
+        (GOOD_THRESHOLD + BAD_THRESHOLD) / 2,
+        GOOD_THRESHOLD - 1e-16,
+        GOOD_THRESHOLD,
+        GOOD_THRESHOLD + 0.1,
+        float("nan"),
+    )
+
+    def test_same_as_single(self, model: SomeModel, mocker: MockerFixture):
+        """Вердикты совпадают с поштучным `predict_message_mood`."""
+        mocker.patch.object(model, "predict", side_effect=self.SCORES * 2)
+        messages = [f"msg{i}" for i in range(len(self.SCORES))]
+        codes = predict_message_mood_batch(messages, model)
+        expected = [predict_message_mood(message, model) for message in messages]
+        assert codes.dtype == np.int8
+        assert [MOODS[code] for code in codes] == expected
+
+    def test_predict_batch_preferred(self, model: SomeModel, mocker: MockerFixture):
+        """Если у модели есть `predict_batch`, `predict` не вызывается."""
+        predict = mocker.spy(model, "predict")
+        batch = mocker.patch.object(model, "predict_batch", return_value=[0.1, 0.9])
+        codes = predict_message_mood_batch(iter(["a", "b"]), model)
+        batch.assert_called_once_with(["a", "b"])
+        predict.assert_not_called()
+        assert codes.tolist() == [BAD_CODE, GOOD_CODE]
+
+    def test_predict_fallback(self, mocker: MockerFixture):
+        """Модель без `predict_batch` вызывается поштучно."""
+        model = mocker.Mock(spec=["predict"])
+        model.predict.side_effect = [0.5, 0.85, 0.2]
+        codes = predict_message_mood_batch(
+            (message for message in "xyz"), model, good_thresholds=0.85
+        )
+        assert model.predict.call_args_list == [mocker.call(m) for m in "xyz"]
+        assert codes.tolist() == [NORM_CODE, GOOD_CODE, BAD_CODE]
+
+    def test_empty(self, model: SomeModel):
+        """Пустая пачка дает пустой массив кодов."""
+        codes = predict_message_mood_batch([], model)
+        assert codes.shape == (0,)
+        assert codes.dtype == np.int8
+
+    def test_classify_scores(self):
+        """Коды вердиктов при измененных порогах."""
+        codes = classify_scores(
+            [0.45, 0.5, 0.85, 0.95, 0.98], bad_thresholds=0.5, good_thresholds=0.95
+        )
+        assert codes.tolist() == [BAD_CODE, BAD_CODE, NORM_CODE, GOOD_CODE, GOOD_CODE]
+
+
+class FakeTimer:
+    """Ручные часы для проверки `ttl`."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCachedModel:
+    """Тесты кеша предсказаний `CachedModel`."""
+
+    def test_hits_and_misses(self, model: SomeModel, mocker: MockerFixture):
+        """Повторное сообщение не доходит до модели."""
+        spy = mocker.spy(model, "predict")
+        cached = CachedModel(model)
+        verdicts = [predict_message_mood(m, cached) for m in ["a", "b", "a", "a"]]
+        assert verdicts == [predict_message_mood(m, model) for m in "abaa"]
+        assert spy.call_count == 2 + 4
+        assert cached.cache_info() == CacheInfo(
+            hits=2, misses=2, maxsize=1024, currsize=2
+        )
+
+    def test_lru_eviction(self, model: SomeModel, mocker: MockerFixture):
+        """Вытесняется давно не использованное предсказание."""
+        spy = mocker.spy(model, "predict")
+        cached = CachedModel(model, maxsize=2)
+        for message in ["a", "b", "a", "c", "a", "b"]:
+            cached.predict(message)
+        assert [call.args[0] for call in spy.call_args_list] == ["a", "b", "c", "b"]
+        assert cached.cache_info().currsize == cached.maxsize
+
+    def test_ttl(self, model: SomeModel, mocker: MockerFixture):
+        """Предсказание живет в кеше не дольше `ttl` секунд."""
+        spy = mocker.spy(model, "predict")
+        timer = FakeTimer()
+        cached = CachedModel(model, ttl=10.0, timer=timer)
+        cached.predict("a")
+        timer.now = 9.5
+        cached.predict("a")
+        timer.now = 10.0
+        cached.predict("a")
+        assert [call.args[0] for call in spy.call_args_list] == ["a", "a"]
+        assert cached.cache_info()[:2] == (1, 2)
+
+    def test_batch(self, model: SomeModel, mocker: MockerFixture):
+        """В `predict_batch` модели попадают только новые сообщения, без повторов."""
+        batch = mocker.spy(model, "predict_batch")
+        cached = CachedModel(model)
+        cached.predict("a")
+        codes = predict_message_mood_batch(["a", "b", "c", "b"], cached)
+        batch.assert_called_once_with(["b", "c"])
+        assert codes.tolist() == predict_message_mood_batch("abcb", model).tolist()
+        assert cached.cache_info()[:2] == (1, 4)
+
+    def test_batch_fallback(self, mocker: MockerFixture):
+        """Модель без `predict_batch` вызывается поштучно только для новых."""
+        model = mocker.Mock(spec=["predict"])
+        model.predict.side_effect = [0.1, 0.9]
+        cached = CachedModel(model)
+        assert cached.predict_batch(["x", "y", "x"]) == [0.1, 0.9, 0.1]
+        assert cached.predict_batch(["y"]) == [0.9]
+        assert model.predict.call_args_list == [mocker.call("x"), mocker.call("y")]
+
+    def test_clear(self, model: SomeModel):
+        """`cache_clear` сбрасывает и кеш, и статистику."""
+        cached = CachedModel(model, maxsize=8)
+        cached.predict_batch(["a", "a"])
+        cached.cache_clear()
+        assert cached.cache_info() == CacheInfo(0, 0, 8, 0)
+
+    def test_threads(self, model: SomeModel):
+        """Счетчики и размер кеша согласованы при вызовах из нескольких потоков."""
+        cached = CachedModel(model, maxsize=50)
+        messages = [str(i % 100) for i in range(10_000)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            scores = list(executor.map(cached.predict, messages))
+        assert scores == [model.predict(m) for m in messages]
+        info = cached.cache_info()
+        assert info.hits + info.misses == len(messages)
+        assert info.currsize == info.maxsize
+
+    @pytest.mark.parametrize("maxsize", [0, -1])
+    def test_bad_maxsize(self, model: SomeModel, maxsize: int):
+        """Размер кеша должен быть положительным."""
+        with pytest.raises(ValueError, match="maxsize"):
+            CachedModel(model, maxsize=maxsize)
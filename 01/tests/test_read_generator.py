@@ -2,13 +2,25 @@
 # pylint: disable=redefined-outer-name
 # pylint: disable=missing-function-docstring,missing-class-docstring
 
+import gzip
 from collections.abc import Iterator
 from pathlib import Path
+from random import Random
 
 import pytest
 from pytest_mock import MockerFixture
 
-from src.read_generator import grepfile, grepiter
+from src.read_generator import (
+    WordMatcher,
+    compile_wordfilter,
+    grepfile,
+    grepfiles,
+    grepiter,
+    grepmmap,
+    grepparallel,
+)
+
+SEED = 42
 
 
 @pytest.fixture(scope="module")
@@ -76,6 +88,36 @@ class TestGrepIter:
         assert list(grepiter(["aa", "bb"], ["aa"])) == ["aa"]
 
 
+class TestWordMatcher:
+    def test_match(self):
+        matcher = WordMatcher(["TeSt", "can"])
+        assert matcher.words == frozenset({"test", "can"})
+        assert matcher.match("a TEST line")
+        assert matcher.match("why writing tests CAN be challenging.")
+        assert not matcher.match("why writing tests")
+        assert not matcher.match("")
+
+    def test_empty_filter(self):
+        assert not WordMatcher([]).match("any line at all")
+        assert not WordMatcher([""]).match("any line at all")
+
+    def test_compile_passthrough(self):
+        matcher = WordMatcher(["aa"])
+        assert compile_wordfilter(matcher) is matcher
+        assert compile_wordfilter(["AA"]).words == matcher.words
+
+    def test_reuse_in_grepiter(self):
+        matcher = WordMatcher(["aa"])
+        assert list(grepiter(["aa", "bb"], matcher)) == ["aa"]
+        assert list(grepiter(["bb", "AA cc"], matcher)) == ["AA cc"]
+
+    def test_filter_built_once(self, mocker: MockerFixture):
+        n_lines = 100
+        spy = mocker.spy(WordMatcher, "__init__")
+        assert len(list(grepiter(["aa"] * n_lines, ["aa"]))) == n_lines
+        spy.assert_called_once()
+
+
 class TestGrepFile:
     @staticmethod
     def assert_iter(file_or_path):
@@ -108,6 +150,10 @@ class TestGrepFile:
         with pytest.raises(StopIteration):
             next(itr)
 
+    def test_with_matcher(self, file_path: Path):
+        itr: Iterator[str] = grepfile(file_path, WordMatcher(["окраска"]))
+        assert list(itr) == ["Окраска калабарии невзрачна"]
+
     def test_nonexistent(self):
         with pytest.raises(FileNotFoundError):
             list(grepfile("./invalid/path", ["noop"]))
@@ -115,3 +161,181 @@ class TestGrepFile:
     def test_type_error(self):
         with pytest.raises(TypeError):
             list(grepfile(43, ["oops"]))  # type: ignore
+
+
+class TestGrepMmap:
+    @pytest.fixture()
+    def in_text(self) -> str:
+        return (
+            "   In the simplest terms, a test is meant to look at the \n"
+            "result of a particular behavior, and make sure that result \n"
+            "\n"
+            "aligns with what you would expect. Behavior is not \r\n"
+            "Окраска калабарии невзрачна\n"
+            "why writing TESTS can be challenging."
+        )
+
+    @pytest.fixture()
+    def text_path(self, tmp_path: Path, in_text: str) -> Path:
+        path = tmp_path / "text.txt"
+        path.write_text(in_text, encoding="utf-8", newline="")
+        return path
+
+    @pytest.mark.parametrize(
+        "wordfilter",
+        [["test"], ["is", "can"], ["RESULT"], ["окраска", "Behavior"], ["nope"], []],
+    )
+    @pytest.mark.parametrize("chunk_size", [1, 16, 1 << 20])
+    def test_same_as_grepfile(
+        self, text_path: Path, wordfilter: list[str], chunk_size: int
+    ):
+        expected = list(grepfile(text_path, wordfilter))
+        assert list(grepmmap(text_path, wordfilter, chunk_size=chunk_size)) == expected
+
+    def test_calabaria(self, file_path: Path):
+        assert list(grepfile(file_path, ["ОКРАСКА"], use_mmap=True)) == [
+            "Окраска калабарии невзрачна"
+        ]
+
+    def test_crlf(self, text_path: Path):
+        assert list(grepmmap(text_path, ["expect."])) == [
+            "aligns with what you would expect. Behavior is not "
+        ]
+
+    def test_many_words(self, text_path: Path):
+        wordfilter = [f"word{i}" for i in range(1_000)] + ["why"]
+        assert list(grepmmap(text_path, wordfilter)) == [
+            "why writing TESTS can be challenging."
+        ]
+
+    def test_unicode_lowering(self, tmp_path: Path):
+        """Символы, у которых `lower` дает ascii или меняет длину строки."""
+        path = tmp_path / "unicode.txt"
+        path.write_text("\u212aey\nİstanbul key\nΟΔΟΣ\n", encoding="utf-8")
+        assert list(grepmmap(path, ["KEY"])) == ["\u212aey", "İstanbul key"]
+        assert list(grepmmap(path, ["οδος"])) == ["ΟΔΟΣ"]
+
+    def test_cp1251(self, tmp_path: Path):
+        path = tmp_path / "cp1251.txt"
+        path.write_text("Живёт во влажных лесах\nОКРАСКА\n", encoding="cp1251")
+        assert list(grepmmap(path, ["окраска"], encoding="cp1251")) == ["ОКРАСКА"]
+
+    def test_unsupported_encoding(self, text_path: Path):
+        with pytest.raises(ValueError, match="utf-16"):
+            list(grepmmap(text_path, ["test"], encoding="utf-16"))
+
+    def test_empty_file(self, datafiles_path: Path):
+        assert not list(grepmmap(datafiles_path / "empty.txt", ["test"]))
+
+    def test_nonexistent(self):
+        with pytest.raises(FileNotFoundError):
+            list(grepfile("./invalid/path", ["noop"], use_mmap=True))
+
+
+class TestGrepParallel:
+    @pytest.fixture()
+    def text_path(self, tmp_path: Path) -> Path:
+        path = tmp_path / "text.txt"
+        rng = Random(SEED)
+        words = ["alpha", "Beta", "gamma", "дельта", "ЭПСИЛОН", "zeta"]
+        path.write_text(
+            "\n".join(
+                f"{i} " + " ".join(rng.choices(words, k=rng.randint(0, 3)))
+                for i in range(2_000)
+            ),
+            encoding="utf-8",
+        )
+        return path
+
+    @pytest.mark.parametrize("wordfilter", [["beta"], ["Дельта", "zeta"], ["nope"]])
+    def test_ordered(self, text_path: Path, wordfilter: list[str]):
+        expected = list(grepfile(text_path, wordfilter))
+        assert expected or wordfilter == ["nope"]
+        assert (
+            list(grepparallel(text_path, wordfilter, max_workers=2, shard_size=500))
+            == expected
+        )
+
+    def test_unordered(self, text_path: Path):
+        expected = list(grepfile(text_path, ["эпсилон"]))
+        unordered = grepparallel(
+            text_path, ["эпсилон"], max_workers=2, ordered=False, shard_size=500
+        )
+        assert sorted(unordered) == sorted(expected)
+
+    def test_default_shards(self, text_path: Path):
+        assert list(grepparallel(text_path, ["gamma"], max_workers=1)) == list(
+            grepfile(text_path, ["gamma"])
+        )
+
+    def test_early_close(self, text_path: Path):
+        itr = grepparallel(text_path, ["alpha"], max_workers=2, shard_size=100)
+        assert next(itr) == next(grepfile(text_path, ["alpha"]))
+        del itr  # ? closes the generator and shuts the pool down
+
+    def test_empty_file(self, datafiles_path: Path):
+        assert not list(grepparallel(datafiles_path / "empty.txt", ["test"]))
+
+    def test_unsupported_encoding(self, datafiles_path: Path):
+        with pytest.raises(ValueError, match="utf-16"):
+            list(grepparallel(datafiles_path / "empty.txt", ["a"], encoding="utf-16"))
+
+
+class TestGrepFiles:
+    @pytest.fixture()
+    def logs_dir(self, tmp_path: Path) -> Path:
+        (tmp_path / "nested").mkdir()
+        (tmp_path / "a.log").write_text("error one\nfine\nERROR two\n")
+        (tmp_path / "b.log").write_text("fine\r\nfine\r\nstill fine error\r\n")
+        (tmp_path / "nested" / "c.log").write_text("no newline at the end error")
+        with gzip.open(tmp_path / "d.log.gz", "wt") as gz_file:
+            gz_file.write("fine\n" * 1_000 + "compressed Error\n")
+        return tmp_path
+
+    def test_directory(self, logs_dir: Path):
+        assert list(grepfiles(logs_dir, ["error"])) == [
+            (logs_dir / "a.log", 1, "error one"),
+            (logs_dir / "a.log", 3, "ERROR two"),
+            (logs_dir / "b.log", 3, "still fine error"),
+            (logs_dir / "d.log.gz", 1_001, "compressed Error"),
+            (logs_dir / "nested" / "c.log", 1, "no newline at the end error"),
+        ]
+
+    def test_glob(self, logs_dir: Path):
+        found = grepfiles(f"{logs_dir}/*.log", ["two"])
+        assert [path.name for path, *_ in found] == ["a.log"]
+        found = grepfiles(f"{logs_dir}/**/*.log", ["error"])
+        assert [path.name for path, *_ in found] == ["a.log", "a.log", "b.log", "c.log"]
+
+    def test_paths_list(self, logs_dir: Path):
+        paths: list[str | Path] = [logs_dir / "b.log", str(logs_dir / "a.log")]
+        assert [line_no for _, line_no, _ in grepfiles(paths, ["fine"])] == [1, 2, 3, 2]
+
+    @pytest.mark.parametrize("block_size", [1, 3, 1 << 20])
+    def test_blocks(self, logs_dir: Path, block_size: int):
+        expected = [
+            (logs_dir / "a.log", line_no + 1, line)
+            for line_no, line in enumerate(["error one", "fine", "ERROR two"])
+            if line != "fine"
+        ]
+        found = grepfiles(logs_dir / "a.log", ["error"], block_size=block_size)
+        assert list(found) == expected
+
+    def test_zstd(self, tmp_path: Path):
+        zstandard = pytest.importorskip("zstandard")
+        path = tmp_path / "e.log.zst"
+        path.write_bytes(zstandard.ZstdCompressor().compress(b"zstd error\nfine\n"))
+        assert list(grepfiles(path, ["error"])) == [(path, 1, "zstd error")]
+
+    def test_nonexistent(self, logs_dir: Path):
+        itr = grepfiles([logs_dir / "a.log", logs_dir / "nope.log"], ["error"])
+        assert next(itr) == (logs_dir / "a.log", 1, "error one")
+        assert next(itr) == (logs_dir / "a.log", 3, "ERROR two")
+        with pytest.raises(FileNotFoundError):
+            next(itr)
+
+    def test_early_close(self, logs_dir: Path):
+        paths = [logs_dir / "d.log.gz"] * 20
+        itr = grepfiles(paths, ["fine"], prefetch=2, block_size=16)
+        assert next(itr) == (logs_dir / "d.log.gz", 1, "fine")
+        del itr  # ? stops the blocked readers and shuts the pool down
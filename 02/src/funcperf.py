@@ -1,16 +1,43 @@
 """Содержит решение для второго пункта домашнего задание #02."""
 
 
+import inspect
+import itertools
+import math
+import operator
+import socket
 import statistics
 import sys
+import threading
 from collections import deque
-from collections.abc import Callable
+from collections.abc import AsyncGenerator, Awaitable, Callable, Coroutine, Sequence
 from functools import wraps
-from time import perf_counter_ns
-from typing import ParamSpec, TypeVar
+from os import PathLike
+from pathlib import Path
+from time import monotonic_ns, perf_counter_ns
+from typing import (
+    Any,
+    BinaryIO,
+    Generic,
+    Literal,
+    NamedTuple,
+    ParamSpec,
+    Protocol,
+    TypeVar,
+    cast,
+)
+
+import orjson
 
 P = ParamSpec("P")
 R = TypeVar("R")
+R_co = TypeVar("R_co", covariant=True)
+T = TypeVar("T")
+S = TypeVar("S")
+S_co = TypeVar("S_co", covariant=True)
+
+SUB_BUCKET_BITS = 4  # 16 log buckets per power of two, ~6% relative error
+WINDOW_SLICES = 10  # sub-histograms per time window of `LatencyHistogram`
 
 
 def mean(n_last: int) -> Callable[[Callable[P, R]], Callable[P, R]]:
@@ -39,3 +66,628 @@ def mean(n_last: int) -> Callable[[Callable[P, R]], Callable[P, R]]:
         return wrapper
 
     return decorator
+
+
+class MeanStats(NamedTuple):
+    """A snapshot of `MovingMean`: total calls and the mean of the last ones."""
+
+    name: str
+    calls: int
+    n_last: int
+    mean_ns: float
+
+    def __str__(self) -> str:
+        return (
+            f"The last {self.n_last} calls of {self.name} took "
+            f"`{self.mean_ns / 1e6:.2f}` ms on average."
+        )
+
+
+class MovingMean:
+    """Mean of the last `n_last` timings, updated in O(1) with a running sum."""
+
+    __slots__ = ("name", "calls", "_timings", "_total_ns")
+
+    def __init__(self, name: str, n_last: int) -> None:
+        if n_last <= 0:
+            raise ValueError(f"Expected n_last {n_last!r} to be positive.")
+        self.name = name
+        self.calls = 0
+        self._timings: deque[int] = deque(maxlen=n_last)
+        self._total_ns = 0
+
+    def add(self, elapsed_ns: int) -> None:
+        """Records a call that took `elapsed_ns` nanoseconds."""
+        timings = self._timings
+        if len(timings) == timings.maxlen:
+            self._total_ns -= timings[0]
+        timings.append(elapsed_ns)
+        self._total_ns += elapsed_ns
+        self.calls += 1
+
+    def absorb(self, other: "MovingMean") -> None:
+        """Adds the calls of `other` and its window to this collector's."""
+        calls = self.calls + other.calls
+        for elapsed_ns in other._timings:  # pylint: disable=protected-access
+            self.add(elapsed_ns)
+        self.calls = calls
+
+    def stats(self) -> MeanStats:
+        """Returns a snapshot of the collected timings."""
+        return self.merge_stats(self.name, [self])
+
+    @staticmethod
+    def merge_stats(name: str, shards: Sequence["MovingMean"]) -> MeanStats:
+        """Stats of several collectors as one: the mean over all their windows."""
+        # pylint: disable=protected-access
+        calls = sum(shard.calls for shard in shards)
+        n_last = sum(len(shard._timings) for shard in shards)
+        total_ns = sum(shard._total_ns for shard in shards)
+        return MeanStats(name, calls, n_last, total_ns / n_last if n_last else 0.0)
+
+
+def _bucket_index(value: int) -> int:
+    """Index of the log bucket for `value`, values below 32 get their own bucket."""
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    if shift <= 0:
+        return value
+    return (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+
+def _bucket_value(index: int) -> int:
+    """A value representing the bucket `index`: the middle of its range."""
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    if shift <= 0:
+        return index
+    low = ((index & ((1 << SUB_BUCKET_BITS) - 1)) | (1 << SUB_BUCKET_BITS)) << shift
+    return low + (1 << shift) // 2
+
+
+N_BUCKETS = _bucket_index((1 << 64) - 1) + 1
+
+
+class PercentileStats(NamedTuple):
+    """A snapshot of `LatencyHistogram`: percentiles of the recorded timings."""
+
+    name: str
+    calls: int
+    n_last: int
+    p50_ns: int
+    p90_ns: int
+    p99_ns: int
+    max_ns: int
+
+    def __str__(self) -> str:
+        return (
+            f"The last {self.n_last} calls of {self.name} took "
+            f"p50=`{self.p50_ns / 1e6:.2f}` p90=`{self.p90_ns / 1e6:.2f}` "
+            f"p99=`{self.p99_ns / 1e6:.2f}` max=`{self.max_ns / 1e6:.2f}` ms."
+        )
+
+
+class LatencyHistogram:
+    """Fixed-memory histogram of timings with log buckets (HDR-style).
+
+    Timings are counted in `N_BUCKETS` buckets, 16 per power of two, so any
+    percentile is known within ~6% regardless of the number of calls.
+    With `n_last`, only the last `n_last` calls are counted (their bucket
+    indices are kept to uncount them later). With `window_s`, only the calls
+    of the last `window_s` seconds are: the window is split into `WINDOW_SLICES`
+    sub-histograms which are reset as time goes on. Otherwise all calls count.
+    """
+
+    __slots__ = (
+        "name",
+        "calls",
+        "_counts",
+        "_last",
+        "_slices",
+        "_slice_ns",
+        "_clock",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        n_last: int | None = None,
+        window_s: float | None = None,
+        clock: Callable[[], int] = monotonic_ns,
+    ) -> None:
+        if n_last is not None and window_s is not None:
+            raise ValueError("Expected either n_last or window_s, not both.")
+        if n_last is not None and n_last <= 0:
+            raise ValueError(f"Expected n_last {n_last!r} to be positive.")
+        if window_s is not None and window_s <= 0:
+            raise ValueError(f"Expected window_s {window_s!r} to be positive.")
+        self.name = name
+        self.calls = 0
+        self._counts = [0] * N_BUCKETS
+        self._last: deque[int] | None = None if n_last is None else deque(maxlen=n_last)
+        self._slices: list[tuple[int, list[int]]] = []  # (slice id, counts)
+        self._slice_ns = 0
+        self._clock = clock
+        if window_s is not None:
+            self._slices = [(-1, [0] * N_BUCKETS) for _ in range(WINDOW_SLICES)]
+            self._slice_ns = max(math.ceil(window_s * 1e9 / WINDOW_SLICES), 1)
+
+    def _current_slice(self) -> list[int]:
+        """The sub-histogram for now, reset if it held an expired slice."""
+        slice_id = self._clock() // self._slice_ns
+        slot = slice_id % len(self._slices)
+        slot_id, counts = self._slices[slot]
+        if slot_id != slice_id:
+            counts = [0] * N_BUCKETS
+            self._slices[slot] = (slice_id, counts)
+        return counts
+
+    def add(self, elapsed_ns: int) -> None:
+        """Records a call that took `elapsed_ns` nanoseconds."""
+        index = _bucket_index(elapsed_ns)
+        self.calls += 1
+        if self._slices:
+            self._current_slice()[index] += 1
+            return
+        self._add_index(index)
+
+    def _add_index(self, index: int) -> None:
+        """Counts a call in bucket `index` without a time window."""
+        last = self._last
+        if last is not None:
+            if len(last) == last.maxlen:
+                self._counts[last[0]] -= 1
+            last.append(index)
+        self._counts[index] += 1
+
+    def absorb(self, other: "LatencyHistogram") -> None:
+        """Adds the calls of `other` (with the same settings) to this histogram."""
+        # pylint: disable=protected-access
+        if self._slices:
+            for slice_id, counts in other._slices:
+                slot = slice_id % len(self._slices)
+                slot_id, own = self._slices[slot]
+                if slot_id == slice_id:
+                    own[:] = map(operator.add, own, counts)
+                elif slot_id < slice_id:
+                    self._slices[slot] = (slice_id, list(counts))
+        elif other._last is not None:
+            for index in other._last:
+                self._add_index(index)
+        else:
+            self._counts[:] = map(operator.add, self._counts, other._counts)
+        self.calls += other.calls
+
+    def _window_counts(self) -> list[int]:
+        if not self._slices:
+            return self._counts
+        oldest_id = self._clock() // self._slice_ns - len(self._slices)
+        live = [counts for slice_id, counts in self._slices if slice_id > oldest_id]
+        if not live:
+            return [0] * N_BUCKETS
+        return [sum(bucket) for bucket in zip(*live, strict=True)]
+
+    def stats(self) -> PercentileStats:
+        """Returns a snapshot of the collected timings."""
+        return self.merge_stats(self.name, [self])
+
+    @staticmethod
+    def merge_stats(name: str, shards: Sequence["LatencyHistogram"]) -> PercentileStats:
+        """Stats of several histograms as one: percentiles of their summed counts."""
+        # pylint: disable=protected-access
+        calls = sum(shard.calls for shard in shards)
+        counts = [
+            sum(bucket)
+            for bucket in zip(*(s._window_counts() for s in shards), strict=True)
+        ]
+        count = sum(counts)
+        if not count:
+            return PercentileStats(name, calls, 0, 0, 0, 0, 0)
+        ranks = [math.ceil(q * count) for q in (0.5, 0.9, 0.99)]
+        values: list[int] = []
+        seen = 0
+        for index, bucket in enumerate(counts):
+            seen += bucket
+            while len(values) < len(ranks) and seen >= ranks[len(values)]:
+                values.append(_bucket_value(index))
+            if seen == count:
+                values.append(_bucket_value(index))  # ? the maximum
+                break
+        return PercentileStats(name, calls, count, *values)
+
+
+class Collector(Protocol[S_co]):
+    """Timing stats backend of `timed`-like decorators."""
+
+    name: str
+
+    @property
+    def calls(self) -> int:
+        """How many calls were recorded in total."""
+
+    def add(self, elapsed_ns: int) -> None:
+        """Records a call that took `elapsed_ns` nanoseconds."""
+
+    def stats(self) -> S_co:
+        """Returns a snapshot of the collected timings."""
+
+
+class MergeableCollector(Collector[S_co], Protocol[S_co]):
+    """A collector whose shards can be merged into one snapshot."""
+
+    @staticmethod
+    def merge_stats(name: str, shards: Sequence[Any]) -> S_co:
+        """Stats of several collectors of this type as one."""
+
+    def absorb(self, other: Any) -> None:
+        """Adds the calls of `other`, a collector of this type, to this one."""
+
+
+class ShardedCollector(Generic[S]):
+    """Thread-safe collector keeping a separate shard per thread.
+
+    Each thread records into its own collector made by `factory`, so the hot
+    path takes no locks; a lock is taken only when a new thread records its
+    first call. `stats` merges the shards with `merge_stats` of their type,
+    so the window of `n_last` calls is per thread. Shards of finished threads
+    are folded (`absorb`) into one retired shard when a new thread starts
+    recording or on `stats`, so their calls still count while the number of
+    shards stays bounded by the number of live threads.
+    """
+
+    __slots__ = ("name", "_factory", "_shards", "_retired", "_lock", "_local")
+
+    def __init__(self, factory: Callable[[], MergeableCollector[S]]) -> None:
+        self._factory = factory
+        self._retired = factory()
+        self.name = self._retired.name
+        self._shards: list[tuple[threading.Thread, MergeableCollector[S]]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._new_shard()
+
+    def _retire_finished(self) -> None:
+        """Folds the shards of finished threads into `_retired`, under `_lock`."""
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                self._retired.absorb(shard)
+        self._shards = alive
+
+    def _new_shard(self) -> MergeableCollector[S]:
+        shard = self._factory()
+        with self._lock:
+            self._retire_finished()
+            self._shards.append((threading.current_thread(), shard))
+        self._local.shard = shard
+        return shard
+
+    @property
+    def calls(self) -> int:
+        """How many calls were recorded in total by all threads.
+
+        Takes `_lock` and sums over the live shards, so it is not for the hot path.
+        """
+        with self._lock:
+            return self._retired.calls + sum(shard.calls for _, shard in self._shards)
+
+    def add(self, elapsed_ns: int) -> None:
+        """Records a call that took `elapsed_ns` nanoseconds in this thread's shard."""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard.add(elapsed_ns)
+
+    def stats(self) -> S:
+        """Returns a snapshot of the timings collected by all threads."""
+        with self._lock:
+            self._retire_finished()
+            shards = [self._retired, *(shard for _, shard in self._shards)]
+        return self._retired.merge_stats(self.name, shards)
+
+
+def _prometheus_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """All collectors of decorated functions, exportable on demand.
+
+    Collectors are keyed by the qualified name of the function
+    (`module.qualname`) and the kind of stats, a newer one replaces an older.
+    """
+
+    def __init__(self) -> None:
+        self._collectors: dict[tuple[str, str], Collector[Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, function: str, collector: Collector[Any]) -> None:
+        """Adds `collector` of the function with the qualified name `function`."""
+        kind = type(collector.stats()).__name__
+        with self._lock:
+            self._collectors[function, kind] = collector
+
+    def clear(self) -> None:
+        """Forgets all registered collectors."""
+        with self._lock:
+            self._collectors.clear()
+
+    def snapshot(self) -> list[tuple[str, MeanStats | PercentileStats]]:
+        """Returns (qualified function name, stats) of every registered collector."""
+        with self._lock:
+            collectors = list(self._collectors.items())
+        return [
+            (function, collector.stats()) for (function, _), collector in collectors
+        ]
+
+    def to_json(self) -> bytes:
+        """All stats as a JSON list of objects, durations in nanoseconds."""
+        # pylint: disable-next=no-member
+        return orjson.dumps(
+            [
+                {**stats._asdict(), "function": function, "kind": type(stats).__name__}
+                for function, stats in self.snapshot()
+            ]
+        )
+
+    def to_prometheus(self) -> bytes:
+        """All stats in the Prometheus text exposition format, durations in seconds."""
+        calls: list[str] = []
+        window: list[str] = []
+        means: list[str] = []
+        quantiles: list[str] = []
+        for function, stats in self.snapshot():
+            labels = f'function="{_prometheus_label(function)}"'
+            kind = type(stats).__name__
+            calls.append(
+                f'funcperf_calls_total{{{labels},kind="{kind}"}} {stats.calls}'
+            )
+            window.append(
+                f'funcperf_window_calls{{{labels},kind="{kind}"}} {stats.n_last}'
+            )
+            if isinstance(stats, MeanStats):
+                means.append(
+                    f"funcperf_mean_seconds{{{labels}}} {stats.mean_ns / 1e9!r}"
+                )
+            else:
+                quantiles.extend(
+                    f'funcperf_duration_seconds{{{labels},quantile="{q}"}} {ns / 1e9!r}'
+                    for q, ns in zip(
+                        ("0.5", "0.9", "0.99", "1"), stats[3:], strict=True
+                    )
+                )
+        lines = [
+            "# HELP funcperf_calls_total Calls of an instrumented function.",
+            "# TYPE funcperf_calls_total counter",
+            *calls,
+            "# HELP funcperf_window_calls Calls included in the reported stats.",
+            "# TYPE funcperf_window_calls gauge",
+            *window,
+            "# HELP funcperf_mean_seconds Mean duration of the last calls.",
+            "# TYPE funcperf_mean_seconds gauge",
+            *means,
+            "# HELP funcperf_duration_seconds Quantiles of duration of the last calls.",
+            "# TYPE funcperf_duration_seconds gauge",
+            *quantiles,
+        ]
+        return "\n".join(lines).encode("utf-8") + b"\n"
+
+    def export(
+        self,
+        target: str | PathLike[str] | socket.socket | BinaryIO,
+        fmt: Literal["prometheus", "json"] = "prometheus",
+    ) -> None:
+        """Writes all stats in `fmt` to a file path, a connected socket or a stream.
+
+        A file is replaced atomically, so a scraper never reads a partial one.
+        """
+        data = self.to_prometheus() if fmt == "prometheus" else self.to_json()
+        match target:
+            case str() | PathLike():
+                path = Path(target)
+                tmp_path = path.with_name(f".{path.name}.tmp")
+                tmp_path.write_bytes(data)
+                tmp_path.replace(path)
+            case socket.socket():
+                target.sendall(data)
+            case _:
+                target.write(data)
+                target.flush()
+
+
+REGISTRY = MetricsRegistry()
+
+
+def _print_stderr(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+class Timed(Protocol[P, R_co, S_co]):
+    """A function decorated with `timed` or `percentiles`."""
+
+    __name__: str  # ? set by `functools.wraps`, like `__doc__`
+    __qualname__: str
+
+    def __call__(self, *args: P.args, **kwargs: P.kwargs) -> R_co:
+        ...
+
+    def stats(self) -> S_co:
+        """Returns a snapshot of the collected timings."""
+
+    def report(self) -> None:
+        """Passes the formatted stats to the `report` function of the decorator."""
+
+
+def _wrap_sync(func: Callable[P, R], record: Callable[[int], None]) -> Callable[P, R]:
+    @wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        begin = perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(perf_counter_ns() - begin)
+
+    return wrapper
+
+
+def _wrap_async(
+    func: Callable[P, Awaitable[T]], record: Callable[[int], None]
+) -> Callable[P, Coroutine[Any, Any, T]]:
+    """Times the awaited execution of a coroutine function."""
+
+    @wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        begin = perf_counter_ns()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            record(perf_counter_ns() - begin)
+
+    return wrapper
+
+
+def _wrap_async_gen(
+    func: Callable[P, AsyncGenerator[T, Any]], record: Callable[[int], None]
+) -> Callable[P, AsyncGenerator[T, Any]]:
+    """Times an async generator as one call: the time spent inside its steps.
+
+    The time the consumer spends between the steps is not counted.
+    Values sent with `asend` and exceptions thrown with `athrow` are passed
+    through; `aclose` closes the wrapped generator.
+    """
+
+    @wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> AsyncGenerator[T, Any]:
+        agen = func(*args, **kwargs)
+        elapsed_ns = 0
+        try:
+            sent, thrown = None, None
+            while True:
+                begin = perf_counter_ns()
+                try:
+                    if thrown is None:
+                        item = await agen.asend(sent)
+                    else:
+                        item = await agen.athrow(thrown)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    elapsed_ns += perf_counter_ns() - begin
+                sent, thrown = None, None
+                try:
+                    sent = yield item
+                except GeneratorExit:
+                    raise
+                except BaseException as exc:  # pylint: disable=broad-exception-caught
+                    thrown = exc
+        finally:
+            await agen.aclose()
+            record(elapsed_ns)
+
+    return wrapper
+
+
+def _instrument(
+    func: Callable[P, R],
+    collector: Collector[S],
+    report_every: int | None,
+    report: Callable[[str], Any],
+) -> Timed[P, R, S]:
+    """Wraps `func` to time its calls into `collector`, registered in `REGISTRY`.
+
+    Coroutine functions are timed until their result is awaited,
+    async generator functions -- until the generator is exhausted or closed.
+    """
+    if report_every is not None and report_every <= 0:
+        raise ValueError(f"Expected report_every {report_every!r} to be positive.")
+    name = getattr(func, "__qualname__", collector.name)
+    REGISTRY.register(f"{getattr(func, '__module__', None)}.{name}", collector)
+
+    def report_stats() -> None:
+        report(str(collector.stats()))
+
+    tickets = itertools.count(1)  # ? next() is atomic, unlike a sum over the shards
+
+    def record(elapsed_ns: int) -> None:
+        collector.add(elapsed_ns)
+        if report_every is not None and next(tickets) % report_every == 0:
+            report_stats()
+
+    wrapper: Callable[..., Any]
+    if inspect.iscoroutinefunction(func):
+        wrapper = _wrap_async(func, record)
+    elif inspect.isasyncgenfunction(func):
+        wrapper = _wrap_async_gen(func, record)
+    else:
+        wrapper = _wrap_sync(func, record)
+
+    timed_wrapper = cast(Timed[P, R, S], wrapper)
+    timed_wrapper.stats = collector.stats  # type: ignore[method-assign]
+    timed_wrapper.report = report_stats  # type: ignore[method-assign]
+    return timed_wrapper
+
+
+def timed(
+    n_last: int,
+    report_every: int | None = None,
+    report: Callable[[str], Any] = _print_stderr,
+    per_thread: bool = False,
+) -> Callable[[Callable[P, R]], Timed[P, R, MeanStats]]:
+    """Like `mean`, but keeps the stats to itself instead of printing on every call.
+
+    A call costs two clock reads and an O(1) update of the running sum.
+    The stats are available as `func.stats()`, `func.report()` passes them
+    to `report` on demand. `async def` functions and async generators are
+    timed until awaited and exhausted respectively.
+
+    :n_last: how many last calls to include in average time calculation.
+    :report_every: also report automatically after every `report_every` calls.
+    :report: a function called with the formatted stats, prints to stderr by default.
+    :per_thread: whether to collect into a `ShardedCollector`, use it if the function
+        is called from many threads at once.
+    """
+    if n_last <= 0:
+        raise ValueError(f"Expected n_last {n_last!r} to be positive.")
+
+    def decorator(func: Callable[P, R]) -> Timed[P, R, MeanStats]:
+        def factory() -> MovingMean:
+            return MovingMean(func.__name__, n_last)
+
+        collector: Collector[MeanStats] = factory()
+        if per_thread:
+            collector = ShardedCollector(factory)
+        return _instrument(func, collector, report_every, report)
+
+    return decorator
+
+
+def percentiles(
+    n_last: int | None = None,
+    window_s: float | None = None,
+    report_every: int | None = None,
+    report: Callable[[str], Any] = _print_stderr,
+    per_thread: bool = False,
+) -> Callable[[Callable[P, R]], Timed[P, R, PercentileStats]]:
+    """Like `timed`, but reports p50/p90/p99/max from a `LatencyHistogram`.
+
+    Memory is constant regardless of the number of calls.
+
+    :n_last: how many last calls to include, all of them by default.
+    :window_s: include only the calls of the last `window_s` seconds instead.
+    :report_every: also report automatically after every `report_every` calls.
+    :report: a function called with the formatted stats, prints to stderr by default.
+    :per_thread: whether to collect into a `ShardedCollector`, see `timed`.
+    """
+    LatencyHistogram("", n_last, window_s)  # ? fail early on invalid arguments
+
+    def decorator(func: Callable[P, R]) -> Timed[P, R, PercentileStats]:
+        def factory() -> LatencyHistogram:
+            return LatencyHistogram(func.__name__, n_last, window_s)
+
+        collector: Collector[PercentileStats] = factory()
+        if per_thread:
+            collector = ShardedCollector(factory)
+        return _instrument(func, collector, report_every, report)
+
+    return decorator
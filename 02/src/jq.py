@@ -1,9 +1,350 @@
 """Содержит решение для первого пункта домашнего задание #02."""
-from collections.abc import Callable
-from typing import Any
+import os
+import re
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from itertools import islice
+from os import PathLike
+from typing import Any, BinaryIO, TypeAlias
 
 import orjson
 
+NDJSON_CHUNK_SIZE = 1 << 20  # bytes
+PARALLEL_BATCH_SIZE = 256  # documents sent to a worker process at once
+
+PathStep: TypeAlias = str | int | None  # dict key, list index or `[*]` wildcard
+_PATH_TOKEN = re.compile(r"\.?([^.\[\]]+)|\[(\d+|\*)\]")
+
+
+def _iter_ndjson_lines(stream: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """Yields non-blank lines of `stream`, reading it by `chunk_size` bytes."""
+    tail = b""
+    while chunk := stream.read(chunk_size):
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        yield from (line for line in lines if line.strip())
+    if tail.strip():
+        yield tail
+
+
+def iter_ndjson(
+    source: str | PathLike[str] | BinaryIO, chunk_size: int = NDJSON_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Yields raw records of an NDJSON file at path `source` or binary stream.
+
+    :source: a path to an NDJSON file or a binary stream opened for reading
+    :chunk_size: how many bytes to read from `source` at once
+    """
+    with ExitStack() as stack:
+        stream = (
+            stack.enter_context(open(source, "rb"))
+            if isinstance(source, str | PathLike)
+            else source
+        )
+        yield from _iter_ndjson_lines(stream, chunk_size)
+
+
+def _iter_ndjson_records(
+    source: str | PathLike[str] | BinaryIO, chunk_size: int
+) -> Iterator[dict[str, Any]]:
+    """Yields parsed records of an NDJSON file at path `source` or binary stream."""
+    for line in iter_ndjson(source, chunk_size):
+        # pylint: disable-next=no-member
+        yield orjson.loads(line)
+
+
+def compile_path(path: str) -> tuple[PathStep, ...]:
+    """Compiles a dotted/indexed path like `items[*].title` into accessor steps.
+
+    `.key` selects a dict value, `[0]` -- a list item, `[*]` -- every item
+    of a list (or every value of a dict).
+
+    :path: a path to compile, e.g. `user.bio`, `items[0].title`, `tags[*]`
+    """
+    steps: list[PathStep] = []
+    pos = 0
+    while pos < len(path):
+        token = _PATH_TOKEN.match(path, pos)
+        # ? keys are separated by dots, but the path doesn't start with one
+        if token is None or (
+            token[1] is not None and path.startswith(".", pos) != (pos > 0)
+        ):
+            raise ValueError(f"Invalid path {path!r} at position {pos}.")
+        key, index = token.groups()
+        if key is not None:
+            steps.append(key)
+        else:
+            steps.append(None if index == "*" else int(index))
+        pos = token.end()
+    return tuple(steps)
+
+
+def _resolve(value: Any, steps: tuple[PathStep, ...], field: str) -> Iterator[Any]:
+    """Yields values at `steps` from `value`, raising `KeyError(field)` if missing."""
+    for depth, step in enumerate(steps):
+        if step is None:
+            if not isinstance(value, list | dict):
+                raise KeyError(field)
+            for item in value.values() if isinstance(value, dict) else value:
+                yield from _resolve(item, steps[depth + 1 :], field)
+            return
+        if not isinstance(value, list if isinstance(step, int) else dict):
+            raise KeyError(field)
+        try:
+            value = value[step]
+        except (KeyError, IndexError) as err:
+            raise KeyError(field) from err
+    yield value
+
+
+def _field_steps(field: str) -> tuple[PathStep, ...] | None:
+    """Compiled path of a required field, `None` for a plain top-level key."""
+    if not re.search(r"[.[\]]", field):
+        return None
+    try:
+        return compile_path(field)
+    except ValueError:  # ? e.g. "v1.2 [beta]" can only be a key
+        return None
+
+
+class JsonQuery:
+    """A `parse_json` query compiled once and run on many JSON documents.
+
+    `keywords` are casefolded into a frozenset, so every word of a document
+    is matched in O(1) regardless of how many keywords there are.
+    `run` calls `keyword_callback` on every match like `parse_json`, while
+    `find` and `count` return all matches of a document at once.
+
+    A required field may be a nested path (see `compile_path`), it is compiled
+    once here. A top-level key equal to the path itself takes precedence,
+    and a field that is not a valid path is just a key, so flat documents
+    are matched as before. Values that are not strings
+    are skipped.
+
+    :required_fields: keys or paths of JSON dict to be searched for match in
+    :keywords: values of JSON dict to search for in every matched key-value
+    :keyword_callback: a function called on matched key, value
+    """
+
+    __slots__ = ("required_fields", "keywords", "keyword_callback", "_paths")
+
+    def __init__(
+        self,
+        required_fields: Iterable[str] | None = None,
+        keywords: Iterable[str] | None = None,
+        keyword_callback: Callable[[str, str], Any] | None = None,
+    ) -> None:
+        self.required_fields = (
+            None if required_fields is None else tuple(required_fields)
+        )
+        self.keywords = (
+            None
+            if keywords is None
+            else frozenset(kword.casefold() for kword in keywords)
+        )
+        self.keyword_callback = keyword_callback
+        self._paths = (
+            None
+            if self.required_fields is None
+            else tuple((field, _field_steps(field)) for field in self.required_fields)
+        )
+
+    def _texts(self, jdic: dict[str, Any]) -> Iterator[tuple[str, Any]]:
+        """Yields (required field, value) pairs of a parsed document."""
+        if self._paths is None:
+            yield from jdic.items()
+            return
+        for field, steps in self._paths:
+            if steps is None or field in jdic:
+                yield field, jdic[field]
+            else:
+                for value in _resolve(jdic, steps, field):
+                    yield field, value
+
+    def match(self, jdic: dict[str, Any]) -> None:
+        """Calls `keyword_callback` on every match in an already parsed document."""
+        keyword_callback = self.keyword_callback
+        if keyword_callback is None:
+            return
+        keywords = self.keywords
+
+        for key, text in self._texts(jdic):
+            if not isinstance(text, str):
+                continue
+            words = text.split()
+            if keywords is None:
+                for word in words:
+                    keyword_callback(key, word)
+            else:
+                for word in words:
+                    if word.casefold() in keywords:
+                        keyword_callback(key, word)
+
+    def run(self, json_str: str | bytes) -> None:
+        """Parses `json_str` and matches it, see `parse_json`."""
+        if self.keyword_callback is not None:
+            # pylint: disable-next=no-member
+            self.match(orjson.loads(json_str))
+
+    def run_ndjson(
+        self,
+        source: str | PathLike[str] | BinaryIO,
+        chunk_size: int = NDJSON_CHUNK_SIZE,
+    ) -> None:
+        """Parses and matches every record of an NDJSON `source`, see `parse_ndjson`."""
+        if self.keyword_callback is not None:
+            for jdic in _iter_ndjson_records(source, chunk_size):
+                self.match(jdic)
+
+    def collect(self, jdic: dict[str, Any]) -> dict[str, list[str]]:
+        """Returns matched words of an already parsed document grouped by key.
+
+        Keys without matches are omitted. Unlike `match`, no callback is called,
+        which saves a function call per matched word.
+        """
+        keywords = self.keywords
+        found: dict[str, list[str]] = {}
+        for key, text in self._texts(jdic):
+            if not isinstance(text, str):
+                continue
+            words = text.split()
+            if keywords is not None:
+                words = [word for word in words if word.casefold() in keywords]
+            if words:
+                found.setdefault(key, []).extend(words)
+        return found
+
+    def find(self, json_str: str | bytes) -> dict[str, list[str]]:
+        """Parses `json_str` and returns its matched words grouped by key."""
+        # pylint: disable-next=no-member
+        return self.collect(orjson.loads(json_str))
+
+    def count(self, json_str: str | bytes) -> Counter[str]:
+        """Parses `json_str` and counts its matched words, casefolded."""
+        return Counter(
+            word.casefold() for words in self.find(json_str).values() for word in words
+        )
+
+    def find_ndjson(
+        self,
+        source: str | PathLike[str] | BinaryIO,
+        chunk_size: int = NDJSON_CHUNK_SIZE,
+    ) -> Iterator[dict[str, list[str]]]:
+        """Lazily yields `find` results for every record of an NDJSON `source`."""
+        for jdic in _iter_ndjson_records(source, chunk_size):
+            yield self.collect(jdic)
+
+    def find_parallel(
+        self,
+        documents: Iterable[str | bytes],
+        max_workers: int | None = None,
+        batch_size: int = PARALLEL_BATCH_SIZE,
+        ordered: bool = True,
+    ) -> Iterator[dict[str, list[str]]]:
+        """Like `find` for every document, but in a pool of worker processes.
+
+        Documents are sent to `max_workers` processes in batches
+        of `batch_size`, at most two batches per process are in flight.
+        If `ordered`, results are yielded in the order of `documents`,
+        otherwise as soon as their batch is done. An error in a document
+        is raised after the results of the documents before it in its batch.
+        To process an NDJSON file,
+        pass `iter_ndjson(source)` as `documents`.
+        """
+        if batch_size <= 0:
+            raise ValueError(f"Expected batch_size {batch_size!r} to be positive.")
+        n_workers = max_workers or os.cpu_count() or 1
+        documents = iter(documents)
+
+        executor = ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(self.required_fields, self.keywords),
+        )
+        try:
+            pending: deque[
+                Future[tuple[list[dict[str, list[str]]], Exception | None]]
+            ] = deque()
+
+            def submit_next() -> None:
+                batch = list(islice(documents, batch_size))
+                if batch:
+                    pending.append(executor.submit(_find_batch, batch))
+
+            for _ in range(2 * n_workers):
+                submit_next()
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done = list(wait(pending, return_when=FIRST_COMPLETED).done)
+                    for future in done:
+                        pending.remove(future)
+                for future in done:
+                    submit_next()
+                    found, error = future.result()
+                    yield from found
+                    if error is not None:
+                        raise error
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def run_parallel(
+        self,
+        documents: Iterable[str | bytes],
+        max_workers: int | None = None,
+        batch_size: int = PARALLEL_BATCH_SIZE,
+        ordered: bool = True,
+    ) -> None:
+        """Like `run` for every document, matching them in `find_parallel`.
+
+        `keyword_callback` is called in this process. With `ordered`, the calls
+        come in the same order as from `run` on each document in turn, except
+        that a document failing with an error gets no calls at all: the error
+        is raised after the calls for the documents before it.
+        """
+        keyword_callback = self.keyword_callback
+        if keyword_callback is None:
+            return
+        for found in self.find_parallel(documents, max_workers, batch_size, ordered):
+            for key, words in found.items():
+                for word in words:
+                    keyword_callback(key, word)
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}({self.required_fields!r}, "
+            f"{None if self.keywords is None else sorted(self.keywords)!r}, "
+            f"{self.keyword_callback!r})"
+        )
+
+
+_worker_query: JsonQuery | None = None
+
+
+def _init_worker(
+    required_fields: Iterable[str] | None, keywords: Iterable[str] | None
+) -> None:
+    """Compiles the query once in a worker process of `JsonQuery.find_parallel`."""
+    global _worker_query  # noqa: PLW0603 pylint: disable=global-statement
+    _worker_query = JsonQuery(required_fields, keywords)
+
+
+def _find_batch(
+    documents: list[str | bytes],
+) -> tuple[list[dict[str, list[str]]], Exception | None]:
+    """Finds matches in `documents` up to the first failing one and its error."""
+    assert _worker_query is not None
+    found = []
+    try:
+        for document in documents:
+            found.append(_worker_query.find(document))
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        return found, err
+    return found, None
+
 
 def parse_json(
     json_str: str,
@@ -21,19 +362,52 @@ def parse_json(
     :required_fields: keys of JSON dict to be searched for match in
     :keywords: values of JSON dict to search for in every matched key-value
     :keyword_callback: a function called on matched key, value
+
+    To run the same query on many documents, compile it once with `JsonQuery`.
     """
     if keyword_callback is not None:
-        # pylint: disable-next=no-member
-        jdic: dict[str, str] = orjson.loads(json_str)
+        JsonQuery(required_fields, keywords, keyword_callback).run(json_str)
 
-        if required_fields is None:
-            required_fields = list(jdic.keys())
 
-        if keywords is not None:
-            keywords = [kword.casefold() for kword in keywords]
+def parse_ndjson(
+    source: str | PathLike[str] | BinaryIO,
+    required_fields: list[str] | None = None,
+    keywords: list[str] | None = None,
+    keyword_callback: Callable[[str, str], Any] | None = None,
+    chunk_size: int = NDJSON_CHUNK_SIZE,
+) -> None:
+    """Like `parse_json`, but for every record of a newline-delimited JSON `source`.
+
+    The source is read in `chunk_size` byte chunks, so only the current chunk
+    and the record being parsed are held in memory. Blank lines are skipped.
 
-        for key in required_fields:  # iterating over json_dict keys
-            words = jdic[key].split()
-            for word in words:
-                if (keywords is None) or (word.casefold() in keywords):
-                    keyword_callback(key, word)
+    :source: a path to an NDJSON file or a binary stream opened for reading
+    :chunk_size: how many bytes to read from `source` at once
+    """
+    JsonQuery(required_fields, keywords, keyword_callback).run_ndjson(
+        source, chunk_size
+    )
+
+
+# pylint: disable-next=too-many-arguments
+def parse_json_parallel(  # noqa: PLR0913
+    documents: Iterable[str | bytes],
+    required_fields: list[str] | None = None,
+    keywords: list[str] | None = None,
+    keyword_callback: Callable[[str, str], Any] | None = None,
+    max_workers: int | None = None,
+    batch_size: int = PARALLEL_BATCH_SIZE,
+    ordered: bool = True,
+) -> None:
+    """Like `parse_json` for every document, parsed and matched in worker processes.
+
+    See `JsonQuery.run_parallel`, `keyword_callback` is still called here.
+
+    :documents: JSON strings, e.g. `iter_ndjson(source)` for an NDJSON file
+    :max_workers: how many worker processes to use, all CPUs by default
+    :batch_size: how many documents to send to a worker at once
+    :ordered: whether to keep the order of `documents`
+    """
+    JsonQuery(required_fields, keywords, keyword_callback).run_parallel(
+        documents, max_workers, batch_size, ordered
+    )
@@ -1,12 +1,34 @@
 # pylint: disable=import-error
+import asyncio
+import inspect
 import math
+import socket
+import threading
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from random import Random
 from time import sleep
+from typing import Any
 from unittest.mock import MagicMock
 
+import orjson
 import pytest
 from pytest_mock import MockerFixture
 
-from src.funcperf import mean
+from src.funcperf import (
+    N_BUCKETS,
+    REGISTRY,
+    LatencyHistogram,
+    MeanStats,
+    MetricsRegistry,
+    MovingMean,
+    PercentileStats,
+    ShardedCollector,
+    mean,
+    percentiles,
+    timed,
+)
 
 
 def sleeper(ms: int) -> None:
@@ -73,3 +95,425 @@ def test_passthrough(mocker: MockerFixture):
     result2 = decorated_mock(foo=False)
     assert result2 == ((), {"foo": False})
     mock.assert_called()
+
+
+def test_moving_mean():
+    collector = MovingMean("f", 3)
+    assert collector.stats() == MeanStats("f", 0, 0, 0.0)
+    for elapsed_ns in [10, 20, 30, 40, 50]:
+        collector.add(elapsed_ns)
+    assert collector.stats() == MeanStats("f", 5, 3, 40.0)
+    assert str(MeanStats("f", 5, 3, 1_234_567)) == (
+        "The last 3 calls of f took `1.23` ms on average."
+    )
+
+
+def test_timed_stats(mocker_sleeper: MagicMock, capsys: pytest.CaptureFixture):
+    time_to_sleep = 1  # ms
+    trail_len = 10
+    decorated_mock = timed(trail_len)(mocker_sleeper)
+    for _ in range(20):
+        decorated_mock(time_to_sleep)
+    stats = decorated_mock.stats()
+    assert stats[:3] == ("sleeper", 20, trail_len)
+    assert time_to_sleep <= stats.mean_ns / 1e6 < 10 * time_to_sleep
+    assert capsys.readouterr() == ("", "")  # ! no output on the hot path
+    decorated_mock.report()
+    assert capsys.readouterr().err == f"{decorated_mock.stats()}\n"
+
+
+def test_timed_report_every(mocker: MockerFixture):
+    report = mocker.stub()
+    decorated = timed(5, report_every=3, report=report)(lambda x: x)
+    assert [decorated(i) for i in range(7)] == list(range(7))
+    assert report.call_count == 7 // 3
+    assert report.call_args.args[0].startswith("The last 5 calls of <lambda>")
+
+
+def test_timed_exception(mocker: MockerFixture):
+    mock = mocker.Mock(side_effect=ZeroDivisionError)
+    mock.__name__ = "failing"
+    decorated_mock = timed(5)(mock)
+    with pytest.raises(ZeroDivisionError):
+        decorated_mock()
+    assert decorated_mock.stats().calls == 1
+
+
+def test_timed_passthrough():
+    @timed(5)
+    def add(first: int, second: int = 1) -> int:
+        """Adds numbers."""
+        return first + second
+
+    assert add(2, second=3) == 2 + 3
+    assert (add.__name__, add.__doc__) == ("add", "Adds numbers.")
+
+
+@pytest.mark.parametrize(("n_last", "report_every"), [(0, None), (5, 0)])
+def test_timed_invalid(n_last: int, report_every: int | None):
+    with pytest.raises(ValueError, match="Expected"):
+        timed(n_last, report_every)(sleeper)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now_ns = 0
+
+    def __call__(self) -> int:
+        return self.now_ns
+
+
+def exact_percentile(values: list[int], q: float) -> int:
+    return sorted(values)[math.ceil(q * len(values)) - 1]
+
+
+def test_histogram_accuracy():
+    rng = Random(99)
+    values = [int(rng.lognormvariate(13, 2)) for _ in range(10_000)]
+    histogram = LatencyHistogram("f")
+    for value in values:
+        histogram.add(value)
+    stats = histogram.stats()
+    assert stats[:3] == ("f", len(values), len(values))
+    for estimate, q in zip(stats[3:], (0.5, 0.9, 0.99, 1.0), strict=True):
+        assert math.isclose(estimate, exact_percentile(values, q), rel_tol=1 / 16)
+
+
+def test_histogram_small_values_exact():
+    histogram = LatencyHistogram("f")
+    for value in [0, 1, 2, 3, 4, 5, 6, 7, 8, 31]:
+        histogram.add(value)
+    assert histogram.stats() == PercentileStats("f", 10, 10, 4, 8, 31, 31)
+
+
+def test_histogram_n_last():
+    histogram = LatencyHistogram("f", n_last=3)
+    for value in [1_000_000, 1, 2, 3]:
+        histogram.add(value)
+    assert histogram.stats() == PercentileStats("f", 4, 3, 2, 3, 3, 3)
+
+
+def test_histogram_window():
+    clock = FakeClock()
+    histogram = LatencyHistogram("f", window_s=1.0, clock=clock)
+    histogram.add(20)
+    clock.now_ns = 500_000_000
+    histogram.add(10)
+    assert histogram.stats()[2:] == (2, 10, 20, 20, 20)
+    clock.now_ns = 1_050_000_000  # ? the first call left the window
+    assert histogram.stats()[2:] == (1, 10, 10, 10, 10)
+    clock.now_ns = 10_000_000_000
+    assert histogram.stats()[2:] == (0, 0, 0, 0, 0)
+    histogram.add(5)
+    assert histogram.stats()[1:] == (3, 1, 5, 5, 5, 5)
+
+
+def test_histogram_buckets():
+    histogram = LatencyHistogram("f")
+    histogram.add((1 << 64) - 1)
+    assert N_BUCKETS < 1_000  # noqa: PLR2004
+    assert math.isclose(histogram.stats().max_ns, 1 << 64, rel_tol=1 / 16)
+
+
+def test_percentiles_decorator(mocker: MockerFixture):
+    report = mocker.stub()
+    decorated = percentiles(n_last=10, report_every=5, report=report)(sleeper)
+    for _ in range(10):
+        decorated(1)
+    stats = decorated.stats()
+    assert stats[:3] == ("sleeper", 10, 10)
+    assert 1 <= stats.p50_ns / 1e6 * (1 + 1 / 16) < 10  # noqa: PLR2004
+    assert report.call_count == 10 // 5
+    assert report.call_args.args[0] == str(stats)
+    assert str(stats).startswith("The last 10 calls of sleeper took p50=`")
+
+
+@pytest.mark.parametrize(
+    ("n_last", "window_s"), [(0, None), (None, 0.0), (None, -1.0), (10, 1.0)]
+)
+def test_percentiles_invalid(n_last: int | None, window_s: float | None):
+    with pytest.raises(ValueError, match="Expected"):
+        percentiles(n_last, window_s)
+
+
+def test_async_function(mocker: MockerFixture):
+    report = mocker.stub()
+
+    @timed(10, report_every=3, report=report)
+    async def async_sleeper(ms: int) -> int:
+        await asyncio.sleep(ms / 1000)
+        return ms
+
+    async def main() -> list[int]:
+        return await asyncio.gather(*(async_sleeper(10) for _ in range(3)))
+
+    assert asyncio.run(main()) == [10, 10, 10]
+    stats = async_sleeper.stats()
+    assert stats.calls == 3  # noqa: PLR2004
+    assert 10 <= stats.mean_ns / 1e6 < 100  # noqa: PLR2004
+    report.assert_called_once_with(str(stats))
+    assert inspect.iscoroutinefunction(async_sleeper)
+
+
+def test_async_function_exception():
+    @percentiles()
+    async def failing() -> None:
+        raise ZeroDivisionError
+
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(failing())
+    assert failing.stats().calls == 1
+
+
+def test_async_generator():
+    @timed(10)
+    async def ticker(n: int) -> AsyncIterator[int]:
+        for i in range(n):
+            await asyncio.sleep(0.002)
+            yield i
+
+    async def consume(n: int, stop: int) -> list[int]:
+        items = []
+        async for item in ticker(n):
+            await asyncio.sleep(0.01)  # ! not counted
+            items.append(item)
+            if item == stop:
+                break
+        return items
+
+    assert asyncio.run(consume(5, -1)) == [0, 1, 2, 3, 4]
+    assert asyncio.run(consume(5, 1)) == [0, 1]
+    stats = ticker.stats()
+    assert stats.calls == 2  # noqa: PLR2004
+    # ? (5 + 2) / 2 sleeps of 2 ms on average, the consumer's 10 ms sleeps excluded
+    assert 7 <= stats.mean_ns / 1e6 < 20  # noqa: PLR2004
+    assert inspect.isasyncgenfunction(ticker)
+
+
+def test_async_generator_asend():
+    @timed(10)
+    async def doubler() -> AsyncGenerator[int, int | None]:
+        value = 0
+        while True:
+            value = (yield value * 2) or 0
+
+    async def main() -> list[int]:
+        agen = doubler()
+        results = [await agen.asend(None)]
+        results += [await agen.asend(value) for value in (1, 2, 3)]
+        await agen.aclose()
+        return results
+
+    assert asyncio.run(main()) == [0, 2, 4, 6]
+    assert doubler.stats().calls == 1
+
+
+def test_async_generator_athrow():
+    @timed(10)
+    async def resilient() -> AsyncGenerator[str, None]:
+        while True:
+            try:
+                yield "ok"
+            except ValueError:
+                yield "handled"
+
+    async def main() -> list[str]:
+        agen = resilient()
+        results = [await agen.asend(None)]
+        results.append(await agen.athrow(ValueError()))
+        results.append(await agen.asend(None))
+        with pytest.raises(KeyError):
+            await agen.athrow(KeyError())
+        return results
+
+    assert asyncio.run(main()) == ["ok", "handled", "ok"]
+    assert resilient.stats().calls == 1
+
+
+def test_sharded_collector():
+    collector = ShardedCollector(lambda: MovingMean("f", 4))
+    collector.add(10)
+
+    def add_six() -> None:
+        for _ in range(6):
+            collector.add(20)
+
+    thread = threading.Thread(target=add_six)
+    thread.start()
+    thread.join()
+    assert collector.calls == 7  # noqa: PLR2004
+    assert collector.stats() == MeanStats("f", 7, 5, (10 + 4 * 20) / 5)
+
+
+def test_sharded_histogram():
+    collector = ShardedCollector(lambda: LatencyHistogram("f"))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(collector.add, [1, 2, 3, 4] * 25))
+    assert collector.stats() == PercentileStats("f", 100, 100, 2, 4, 4, 4)
+
+
+@pytest.mark.parametrize(
+    "decorator", [timed(10, per_thread=True), percentiles(per_thread=True)]
+)
+def test_per_thread_decorators(decorator: Callable[[Callable[[int], int]], Any]):
+    n_threads, n_calls = 16, 200
+    decorated = decorator(lambda x: x + 1)
+    barrier = threading.Barrier(n_threads)
+
+    def work(_: int) -> list[int]:
+        barrier.wait()
+        return [decorated(i) for i in range(n_calls)]
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        results = list(executor.map(work, range(n_threads)))
+    assert results == [list(range(1, n_calls + 1))] * n_threads
+    assert decorated.stats().calls == n_threads * n_calls
+
+
+@pytest.mark.parametrize(
+    "factory",
+    [
+        lambda: MovingMean("f", 4),
+        lambda: LatencyHistogram("f"),
+        lambda: LatencyHistogram("f", n_last=4),
+        lambda: LatencyHistogram("f", window_s=1.0, clock=FakeClock()),
+    ],
+)
+def test_sharded_retires_finished_threads(factory: Callable[[], Any]):
+    collector, reference = ShardedCollector(factory), factory()
+    for value in range(1, 51):
+        thread = threading.Thread(target=collector.add, args=(value,))
+        thread.start()
+        thread.join()
+        reference.add(value)
+    assert len(collector._shards) <= 2  # noqa: PLR2004 pylint: disable=protected-access
+    assert collector.calls == reference.calls
+    assert collector.stats() == reference.stats()
+
+
+def test_histogram_absorb_window():
+    clock = FakeClock()
+    old, new = (LatencyHistogram("f", window_s=1.0, clock=clock) for _ in range(2))
+    old.add(20)
+    clock.now_ns = 500_000_000
+    new.add(10)
+    old.add(30)
+    new.absorb(old)
+    assert new.stats()[1:] == (3, 3, 20, 30, 30, 30)
+    clock.now_ns = 1_050_000_000
+    assert new.stats()[1:] == (3, 2, 10, 30, 30, 30)
+
+
+def test_per_thread_window_from_other_thread():
+    @percentiles(window_s=1.0, per_thread=True, report_every=1, report=lambda _: None)
+    def doubler(x: int) -> int:
+        return 2 * x
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(doubler(2)))
+    thread.start()
+    thread.join()
+    assert results == [4]
+    assert doubler.stats().calls == 1
+    assert doubler.stats().n_last == 1
+
+
+def test_per_thread_report_every():
+    reports: list[str] = []
+
+    @percentiles(per_thread=True, report_every=5, report=reports.append)
+    def noop() -> None:
+        pass
+
+    def call_many() -> None:
+        for _ in range(50):
+            noop()
+
+    threads = [threading.Thread(target=call_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert noop.stats().calls == 4 * 50
+    assert len(reports) == 4 * 50 // 5
+
+
+@pytest.fixture()
+def registry() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    mean_ns = MovingMean("f", 4)
+    for elapsed_ns in (1_000, 3_000):
+        mean_ns.add(elapsed_ns)
+    histogram = LatencyHistogram("g")
+    for elapsed_ns in (1, 2, 3, 4):
+        histogram.add(elapsed_ns)
+    registry.register("mod.f", mean_ns)
+    registry.register('mod.g"\\', histogram)
+    return registry
+
+
+def test_registry_decorators():
+    @timed(10)
+    @percentiles()
+    def registered() -> None:
+        pass
+
+    registered()
+    functions = dict.fromkeys(function for function, _ in REGISTRY.snapshot())
+    assert f"{__name__}.test_registry_decorators.<locals>.registered" in functions
+    stats = {
+        type(stats)
+        for function, stats in REGISTRY.snapshot()
+        if "<locals>.registered" in function
+    }
+    assert stats == {MeanStats, PercentileStats}
+
+
+def test_registry_json(registry: MetricsRegistry):
+    assert orjson.loads(registry.to_json()) == [  # pylint: disable=no-member
+        {
+            "function": "mod.f",
+            "kind": "MeanStats",
+            "name": "f",
+            "calls": 2,
+            "n_last": 2,
+            "mean_ns": 2_000.0,
+        },
+        {
+            "function": 'mod.g"\\',
+            "kind": "PercentileStats",
+            "name": "g",
+            "calls": 4,
+            "n_last": 4,
+            "p50_ns": 2,
+            "p90_ns": 4,
+            "p99_ns": 4,
+            "max_ns": 4,
+        },
+    ]
+
+
+def test_registry_prometheus(registry: MetricsRegistry):
+    lines = registry.to_prometheus().decode().splitlines()
+    assert "# TYPE funcperf_calls_total counter" in lines
+    assert 'funcperf_calls_total{function="mod.f",kind="MeanStats"} 2' in lines
+    assert 'funcperf_mean_seconds{function="mod.f"} 2e-06' in lines
+    assert (
+        'funcperf_duration_seconds{function="mod.g\\"\\\\",quantile="0.99"} 4e-09'
+        in lines
+    )
+    assert all(line.startswith("#") or line.startswith("funcperf_") for line in lines)
+
+
+def test_registry_export(registry: MetricsRegistry, tmp_path: Path):
+    path = tmp_path / "funcperf.prom"
+    registry.export(path)
+    assert path.read_bytes() == registry.to_prometheus()
+    assert list(tmp_path.iterdir()) == [path]
+
+    left, right = socket.socketpair()
+    with left, right:
+        registry.export(left, fmt="json")
+        left.shutdown(socket.SHUT_WR)
+        received = b"".join(iter(lambda: right.recv(4096), b""))
+    assert received == registry.to_json()
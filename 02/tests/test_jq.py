@@ -1,11 +1,22 @@
-# pylint: disable=import-error
+# pylint: disable=import-error,redefined-outer-name
+import io
+import re
 from json import JSONDecodeError
+from pathlib import Path
 from typing import Any
 
+import orjson
 import pytest
 from pytest_mock import MockerFixture
 
-from src.jq import parse_json
+from src.jq import (
+    JsonQuery,
+    compile_path,
+    iter_ndjson,
+    parse_json,
+    parse_json_parallel,
+    parse_ndjson,
+)
 
 
 def test_example_print(capsys: pytest.CaptureFixture):
@@ -154,3 +165,296 @@ def test_giant_json(json_str_giant: str, mocker: MockerFixture):
     callback = mocker.stub()
     parse_json(json_str=json_str_giant, keyword_callback=callback)
     callback.assert_called()  # ! assert
+
+
+NDJSON_RECORDS = [
+    b'{"key1": "Word1 word2", "key2": "word2 word3"}',
+    b"",
+    b'  {"key1": "WORD2", "key2": "nothing"}',
+    b'{"key1": "\\u0441\\u043b\\u043e\\u0432\\u043e word2 word2", "key2": "x"}',
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+@pytest.mark.parametrize("ending", [b"", b"\n", b"\r\n"])
+def test_ndjson_stream(mocker: MockerFixture, chunk_size: int, ending: bytes):
+    callback = mocker.stub()
+    stream = io.BytesIO(b"\n".join(NDJSON_RECORDS) + ending)
+    parse_ndjson(
+        stream,
+        required_fields=["key1"],
+        keywords=["Word2"],
+        keyword_callback=callback,
+        chunk_size=chunk_size,
+    )
+    assert callback.call_args_list == [
+        mocker.call("key1", "word2"),
+        mocker.call("key1", "WORD2"),
+        mocker.call("key1", "word2"),
+        mocker.call("key1", "word2"),
+    ]
+
+
+def test_ndjson_same_as_json(json_str_alpha: str, json_str_beta: str, tmp_path: Path):
+    path = tmp_path / "records.ndjson"
+    path.write_text(f"{json_str_alpha}\n{json_str_beta}\n", encoding="utf-8")
+    expected: list[tuple[str, str]] = []
+    for json_str in (json_str_alpha, json_str_beta):
+        parse_json(
+            json_str,
+            keywords=["hard", "палка"],
+            keyword_callback=lambda k, w: expected.append((k, w)),
+        )
+    found: list[tuple[str, str]] = []
+    parse_ndjson(
+        path,
+        keywords=["hard", "палка"],
+        keyword_callback=lambda k, w: found.append((k, w)),
+    )
+    assert found == expected
+    assert len(found) == 7  # noqa: PLR2004
+
+
+def test_ndjson_noop(mocker: MockerFixture):
+    stream = mocker.Mock(spec=io.BytesIO)
+    parse_ndjson(stream, keyword_callback=None)
+    stream.read.assert_not_called()
+
+
+def test_ndjson_invalid_key(mocker: MockerFixture):
+    callback = mocker.stub()
+    with pytest.raises(KeyError, match="oops"):
+        parse_ndjson(io.BytesIO(NDJSON_RECORDS[0]), ["oops"], keyword_callback=callback)
+
+
+def test_ndjson_parse_error(mocker: MockerFixture):
+    callback = mocker.stub()
+    stream = io.BytesIO(NDJSON_RECORDS[0] + b"\n+=12qwsasd\n")
+    with pytest.raises(JSONDecodeError):
+        parse_ndjson(stream, keyword_callback=callback)
+    assert callback.call_count == 4  # noqa: PLR2004
+
+
+def test_query_reuse(json_str_alpha: str, json_str_beta: str, mocker: MockerFixture):
+    callback = mocker.stub()
+    query = JsonQuery(["apply", "provide"], ["HARD", "hArD", "палка"], callback)
+    assert query.keywords == frozenset({"hard", "палка"})
+    query.run(json_str_alpha)
+    query.run(json_str_alpha.encode("utf-8"))
+    assert callback.call_args_list == 2 * [
+        mocker.call("apply", "hard"),
+        mocker.call("provide", "Hard"),
+    ]
+    with pytest.raises(KeyError, match="apply"):
+        query.run(json_str_beta)
+
+
+def test_query_same_as_parse_json(json_str_giant: str, mocker: MockerFixture):
+    keywords = [word.upper() for word in json_str_giant.split()[::50]]
+    expected = mocker.stub()
+    parse_json(json_str_giant, keywords=keywords, keyword_callback=expected)
+    callback = mocker.stub()
+    JsonQuery(keywords=keywords, keyword_callback=callback).run(json_str_giant)
+    assert callback.call_args_list == expected.call_args_list
+    assert callback.call_count > 0
+
+
+def test_query_noop(mocker: MockerFixture):
+    mock = mocker.stub()
+    mocker.patch("orjson.loads", mock)
+    query = JsonQuery(keywords=["word2"])
+    query.run('{"key1": "Word1 word2"}')
+    query.run_ndjson(io.BytesIO(b'{"key1": "Word1 word2"}'))
+    mock.assert_not_called()
+
+
+def test_query_repr():
+    query = JsonQuery(["key1"], ["B", "a"], print)
+    assert repr(query) == "JsonQuery(('key1',), ['a', 'b'], <built-in function print>)"
+
+
+def test_query_find(json_str_beta: str):
+    query = JsonQuery(keywords=["палка", "dinner"])
+    assert query.find(json_str_beta) == {
+        "Головной!": ["палка"],
+        "34876командование": ["Палка", "dinner"],
+        "Палка": ["ПАЛКА", "палка", "ПаЛка"],
+    }
+    assert query.count(json_str_beta) == {"палка": 5, "dinner": 1}
+    assert not JsonQuery(["Ведьg"], ["палка"]).find(json_str_beta)
+
+
+def test_query_find_all_words(json_str_alpha: str):
+    query = JsonQuery(["apply", "provide", "why"])
+    assert query.find(json_str_alpha) == {
+        "apply": ["hard"],
+        "provide": ["million", "Hard"],
+        "why": ["Product"],
+    }
+    assert query.count(json_str_alpha) == {"hard": 2, "million": 1, "product": 1}
+
+
+@pytest.mark.parametrize("keywords", [None, ["палка", "ЖИТЬ", "dinner", "6.2"]])
+def test_query_find_same_as_run(
+    json_str_beta: str, mocker: MockerFixture, keywords: list[str] | None
+):
+    callback = mocker.stub()
+    query = JsonQuery(keywords=keywords, keyword_callback=callback)
+    query.run(json_str_beta)
+    assert [
+        mocker.call(key, word)
+        for key, words in query.find(json_str_beta).items()
+        for word in words
+    ] == callback.call_args_list
+
+
+def test_query_find_ndjson():
+    stream = io.BytesIO(b"\n".join(NDJSON_RECORDS))
+    found = JsonQuery(["key1"], ["word2"]).find_ndjson(stream)
+    assert list(found) == [
+        {"key1": ["word2"]},
+        {"key1": ["WORD2"]},
+        {"key1": ["word2", "word2"]},
+    ]
+
+
+NESTED_JSON = orjson.dumps(  # pylint: disable=no-member
+    {
+        "user": {"name": "Hard Worker", "bio": "works hard", "age": 42},
+        "items": [
+            {"title": "hard drive", "tags": ["HARD", "disk"]},
+            {"title": "soft toy", "tags": []},
+        ],
+        "user.bio": "flat key with dots is hard",
+    }
+).decode("utf-8")
+
+
+@pytest.mark.parametrize(
+    ("path", "steps"),
+    [
+        ("key", ("key",)),
+        ("user.bio", ("user", "bio")),
+        ("items[*].title", ("items", None, "title")),
+        ("a[0][12].b", ("a", 0, 12, "b")),
+        ("tags[*]", ("tags", None)),
+    ],
+)
+def test_compile_path(path: str, steps: tuple[str | int | None, ...]):
+    assert compile_path(path) == steps
+
+
+@pytest.mark.parametrize("path", [".a", "a..b", "a.[0]", "a[", "a[x]", "a.", "a[0]b"])
+def test_compile_path_invalid(path: str):
+    with pytest.raises(ValueError, match="Invalid path"):
+        compile_path(path)
+
+
+def test_nested_paths(mocker: MockerFixture):
+    callback = mocker.stub()
+    parse_json(
+        NESTED_JSON,
+        required_fields=["user.name", "items[*].title", "items[0].tags[*]"],
+        keywords=["hard"],
+        keyword_callback=callback,
+    )
+    assert callback.call_args_list == [
+        mocker.call("user.name", "Hard"),
+        mocker.call("items[*].title", "hard"),
+        mocker.call("items[0].tags[*]", "HARD"),
+    ]
+
+
+def test_nested_find():
+    query = JsonQuery(["items[*].title", "user[*]", "items[1].tags[*]"])
+    assert query.find(NESTED_JSON) == {
+        "items[*].title": ["hard", "drive", "soft", "toy"],
+        "user[*]": ["Hard", "Worker", "works", "hard"],
+    }
+
+
+def test_invalid_path_is_flat_key():
+    query = JsonQuery(["a]", "v1.2 [beta]", "b.c"], ["hit"])
+    document = '{"a]": "hit one", "v1.2 [beta]": "a hit", "b.c": "miss"}'
+    assert query.find(document) == {"a]": ["hit"], "v1.2 [beta]": ["hit"]}
+
+
+def test_flat_key_takes_precedence(mocker: MockerFixture):
+    callback = mocker.stub()
+    parse_json(NESTED_JSON, ["user.bio"], ["hard"], callback)
+    callback.assert_called_once_with("user.bio", "hard")
+
+
+def test_non_string_values_skipped():
+    query = JsonQuery(["user.age", "user"], ["42"])
+    assert not query.find(NESTED_JSON)
+    assert JsonQuery(keywords=["hard"]).find(NESTED_JSON) == {"user.bio": ["hard"]}
+
+
+@pytest.mark.parametrize(
+    "path", ["user.email", "items[2].title", "items[*].price", "user[0]", "user.bio[*]"]
+)
+def test_nested_missing(path: str, mocker: MockerFixture):
+    callback = mocker.stub()
+    with pytest.raises(KeyError, match=re.escape(path)):
+        parse_json(NESTED_JSON, [path], ["hard"], callback)
+
+
+@pytest.fixture()
+def documents(json_str_alpha: str, json_str_beta: str) -> list[str]:
+    return [json_str_alpha, json_str_beta, NESTED_JSON] * 20
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 256])
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_parallel_same_as_sequential(
+    documents: list[str], mocker: MockerFixture, batch_size: int, max_workers: int
+):
+    keywords = ["hard", "палка", "dinner"]
+    expected = mocker.stub()
+    for document in documents:
+        parse_json(document, keywords=keywords, keyword_callback=expected)
+    callback = mocker.stub()
+    parse_json_parallel(
+        iter(documents),
+        keywords=keywords,
+        keyword_callback=callback,
+        max_workers=max_workers,
+        batch_size=batch_size,
+    )
+    assert callback.call_args_list == expected.call_args_list
+
+
+def test_parallel_unordered(documents: list[str]):
+    query = JsonQuery(keywords=["hard", "палка"])
+    found = list(
+        query.find_parallel(documents, max_workers=2, batch_size=3, ordered=False)
+    )
+    assert sorted(map(repr, found)) == sorted(
+        repr(query.find(doc)) for doc in documents
+    )
+
+
+def test_parallel_ndjson(tmp_path: Path):
+    path = tmp_path / "records.ndjson"
+    path.write_bytes(b"\n".join(NDJSON_RECORDS))
+    query = JsonQuery(["key1"], ["word2"])
+    found = list(query.find_parallel(iter_ndjson(path), max_workers=2))
+    assert found == list(query.find_ndjson(path))
+
+
+def test_parallel_errors(documents: list[str], mocker: MockerFixture):
+    callback = mocker.stub()
+    with pytest.raises(KeyError, match="apply"):
+        parse_json_parallel(documents, ["apply"], ["hard"], callback, max_workers=2)
+    callback.assert_called_once_with("apply", "hard")
+    with pytest.raises(JSONDecodeError):
+        parse_json_parallel([*documents[:2], "+=12q"], keyword_callback=callback)
+    with pytest.raises(ValueError, match="batch_size"):
+        next(JsonQuery().find_parallel(documents, batch_size=0))
+
+
+def test_parallel_noop(mocker: MockerFixture):
+    documents = mocker.MagicMock()
+    parse_json_parallel(documents, keywords=["hard"])
+    documents.__iter__.assert_not_called()
@@ -0,0 +1,68 @@
+"""Сравнивает `sum_lists`/`sum_arrays` с наивным `sum(lists, CustomList())`."""
+import argparse
+import os
+from collections.abc import Callable
+from random import Random
+from time import perf_counter
+
+from custom_list import CustomList, sum_arrays, sum_lists
+
+try:
+    import numpy
+except ImportError:  # sum_arrays is benchmarked only if numpy is installed
+    numpy = None  # type: ignore[assignment]
+
+
+def make_lists(n_lists: int, length: int, seed: int) -> list[CustomList]:
+    """`n_lists` списков случайных целых длиной от `length // 2` до `length`."""
+    rng = Random(seed)
+    return [
+        CustomList(rng.choices(range(-1000, 1000), k=rng.randint(length // 2, length)))
+        for _ in range(n_lists)
+    ]
+
+
+def best_time(func: Callable[[], object], repeat: int) -> tuple[float, object]:
+    """Лучшее время из `repeat` запусков `func` и ее результат."""
+    timings, result = [], None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = func()
+        timings.append(perf_counter() - start)
+    return min(timings), result
+
+
+def main() -> None:
+    """Печатает лучшее время каждого способа и ускорение относительно наивного."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lists", type=int, default=2_000, help="number of lists")
+    parser.add_argument("--length", type=int, default=2_000, help="max list length")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=999)
+    args = parser.parse_args()
+
+    lists = make_lists(args.lists, args.length, args.seed)
+    candidates: dict[str, Callable[[], object]] = {
+        "sum(lists, CustomList())": lambda: sum(lists, CustomList()),
+        "sum_lists(lists)": lambda: sum_lists(lists),
+        f"sum_lists(lists, processes={args.processes})": lambda: sum_lists(
+            lists, processes=args.processes
+        ),
+    }
+    if numpy is not None:
+        candidates["sum_arrays(lists)"] = lambda: sum_arrays(lists)
+
+    print(f"{args.lists} lists of up to {args.length} ints, best of {args.repeat}:")
+    baseline, expected = None, None
+    for name, func in candidates.items():
+        elapsed, result = best_time(func, args.repeat)
+        result = list(result)  # type: ignore[call-overload]
+        if baseline is None:
+            baseline, expected = elapsed, result
+        assert result == expected, f"{name} differs from the naive fold"
+        print(f"  {name:<36} {elapsed:8.3f} s  x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,33 @@
 """Содержит решение для первого пункта домашнего задания #03."""
 from __future__ import annotations
 
-from collections.abc import Callable, Iterable
-from itertools import zip_longest
+import operator
+import os
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from itertools import chain, islice, starmap, zip_longest
 from math import isclose
-from typing import TypeAlias
+from typing import Any, SupportsIndex, TypeAlias, TypeVar, overload
+
+try:
+    import numpy as np
+    import numpy.typing as npt
+except ImportError:  # NumpyCustomList is available only if numpy is installed
+    np = None  # type: ignore[assignment]
 
 Number: TypeAlias = float | int
 
+ARRAY_TYPECODES = ("q", "d")  # int64, float64
+REDUCE_CHUNK_SIZE = 64  # lists per process pool task of `sum_lists`
+REDUCE_BATCH_SIZE = 256  # rows of a padded 2-D array in `sum_arrays`
+
+T = TypeVar("T")
+
 
 class CustomList(list):
     """Позволяет складываться/вычитаться друг с другом и с обычными списками.
@@ -16,6 +36,14 @@ class CustomList(list):
     исходные списки остаются неизменными.
     Отсутствующие элементы меньшего списка считаются нулями.
 
+    Сумма элементов, по которой списки сравниваются, считается один раз и
+    обновляется изменяющими методами списка, так что сравнения -- O(1).
+    Для целых чисел любое изменение обновляет сумму за время, пропорциональное
+    числу измененных элементов. С дробными изменения сбрасывают ее, и она
+    пересчитывается при следующем обращении: `sum` складывает дробные
+    по-разному в разных версиях Python (с 3.12 -- с компенсацией ошибок),
+    так что дописанная к старой сумме разошлась бы с `sum(self)`.
+
     >>> CustomList([5, 1, 3, 7]) + CustomList([1, 2, 7])
     [6, 3, 10, 7]
 
@@ -25,8 +53,17 @@ class CustomList(list):
     >>> CustomList([5, 1, 3, 7]) - CustomList([1, 2, 7])
     [4, -1, -4, 7]
 
+    `+=` и `-=` работают так же, но изменяют левый список на месте:
+
+    >>> total = CustomList([1, 2])
+    >>> total += [10, 20, 30]
+    >>> total
+    [11, 22, 30]
+
     """
 
+    _sum: Number | None = None  # ? None -- sum is to be recomputed
+
     @staticmethod
     def _zipper(
         func: Callable[[tuple[Number, Number]], Number],
@@ -35,12 +72,125 @@ class CustomList(list):
     ) -> map[Number]:
         return map(func, zip_longest(left, right, fillvalue=0))
 
+    def _added(self, values: Iterable[Number]) -> None:
+        """Учитывает в сумме `values`, добавленные в конец списка."""
+        self._replaced((), values)
+
+    def _replaced(self, removed: Iterable[Number], added: Iterable[Number]) -> None:
+        """Учитывает в сумме замену элементов `removed` на `added`."""
+        added = list(added)
+        if isinstance(self._sum, int) and all(isinstance(x, int) for x in added):
+            self._sum += sum(added) - sum(removed)
+        else:
+            self._sum = None
+
+    def __getstate__(self) -> None:
+        """Копии (`copy`, `pickle`) пересчитывают сумму сами.
+
+        Иначе `copy` восстановил бы сумму до того, как добавить элементы
+        через `extend`/`append`, и они посчитались бы в ней дважды.
+        """
+        return None
+
+    def sum(self) -> Number:
+        """Сумма элементов, посчитанная заранее (или сейчас, если ее сбросили)."""
+        if self._sum is None:
+            self._sum = sum(self)
+        return self._sum
+
     def is_equal(self, other: object) -> bool:
         """Default list's element-wise `__eq__` behavior."""
         return super().__eq__(other)
 
+    def append(self, __object: Number) -> None:
+        super().append(__object)
+        self._added((__object,))
+
+    def extend(self, __iterable: Iterable[Number]) -> None:
+        values = list(__iterable)
+        super().extend(values)
+        self._added(values)
+
+    def insert(self, __index: SupportsIndex, __object: Number) -> None:
+        super().insert(__index, __object)
+        self._replaced((), (__object,))
+
+    def pop(self, __index: SupportsIndex = -1) -> Number:
+        value = super().pop(__index)
+        self._replaced((value,), ())
+        return value
+
+    def remove(self, __value: Number) -> None:
+        del self[self.index(__value)]
+
+    def clear(self) -> None:
+        super().clear()
+        self._sum = 0
+
+    def sort(self, *args: Any, **kwargs: Any) -> None:
+        super().sort(*args, **kwargs)
+        self._replaced((), ())  # ? the order of float additions changed
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._replaced((), ())
+
+    @overload
+    def __setitem__(self, __key: SupportsIndex, __value: Number) -> None:
+        ...
+
+    @overload
+    def __setitem__(self, __key: slice, __value: Iterable[Number]) -> None:
+        ...
+
+    def __setitem__(self, __key: SupportsIndex | slice, __value: Any) -> None:
+        if isinstance(__key, slice):
+            removed, added = self[__key], list(__value)
+        else:
+            removed, added = [self[__key]], [__value]
+        super().__setitem__(__key, added if isinstance(__key, slice) else __value)
+        self._replaced(removed, added)
+
+    def __delitem__(self, __key: SupportsIndex | slice) -> None:
+        removed = self[__key] if isinstance(__key, slice) else [self[__key]]
+        super().__delitem__(__key)
+        self._replaced(removed, ())
+
+    def _inplace(
+        self, func: Callable[[Number, Number], Number], right: Iterable[Number]
+    ) -> CustomList:
+        """`self = func(self, right)` поэлементно без создания нового `CustomList`.
+
+        Недостающие элементы считаются нулями: общая часть обновляется
+        на месте, хвост более длинного `right` дописывается в конец.
+        """
+        values = right if isinstance(right, Sequence) else list(right)
+        common = min(len(self), len(values))
+        tail, delta = values[common:], sum(values)  # ? before `self += self` changes
+        super().__setitem__(slice(common), map(func, self, values))
+        super().extend(tail if func is operator.add else map(partial(func, 0), tail))
+        if isinstance(self._sum, int) and isinstance(delta, int):
+            self._sum = func(self._sum, delta)
+        else:
+            self._sum = None
+        return self
+
+    def __iadd__(self, __value: Iterable[Number]) -> CustomList:  # type: ignore
+        return self._inplace(operator.add, __value)
+
+    def __isub__(self, __value: Iterable[Number]) -> CustomList:
+        return self._inplace(operator.sub, __value)
+
+    def __imul__(self, __value: SupportsIndex) -> CustomList:
+        super().__imul__(__value)
+        if isinstance(self._sum, int):
+            self._sum *= max(operator.index(__value), 0)
+        else:
+            self._sum = None
+        return self
+
     def __str__(self) -> str:
-        return f"data={super().__str__()}, sum={sum(self)}"
+        return f"data={super().__str__()}, sum={self.sum()}"
 
     def __add__(self, right: Iterable[Number]) -> CustomList:  # type: ignore
         return type(self)(self._zipper(sum, self, right))
@@ -57,7 +207,7 @@ class CustomList(list):
     def __eq__(self, __value: object) -> bool:
         if not isinstance(__value, type(self)):
             return NotImplemented  # pragma: no cover
-        return isclose(sum(self), sum(__value))
+        return isclose(self.sum(), __value.sum())
 
     def __ne__(self, __value: object) -> bool:
         result = self.__eq__(__value)
@@ -68,19 +218,703 @@ class CustomList(list):
     def __le__(self, __value: list[Number]) -> bool:
         if not isinstance(__value, type(self)):
             return NotImplemented  # pragma: no cover
-        return (sum(self) <= sum(__value)) or self == __value
+        left, right = self.sum(), __value.sum()
+        return left <= right or isclose(left, right)
 
     def __lt__(self, __value: list[Number]) -> bool:
         if not isinstance(__value, type(self)):
             return NotImplemented  # pragma: no cover
-        return sum(self) < sum(__value)
+        return self.sum() < __value.sum()
 
     def __ge__(self, __value: list[Number]) -> bool:
         if not isinstance(__value, type(self)):
             return NotImplemented  # pragma: no cover
-        return sum(self) >= sum(__value) or self == __value
+        left, right = self.sum(), __value.sum()
+        return left >= right or isclose(left, right)
 
     def __gt__(self, __value: list[Number]) -> bool:
         if not isinstance(__value, type(self)):
             return NotImplemented  # pragma: no cover
-        return sum(self) > sum(__value)
+        return self.sum() > __value.sum()
+
+
+def _sum_of(value: object) -> Number | None:
+    """Сумма `value`, если это один из кастомных списков, иначе `None`."""
+    if isinstance(value, CustomList | _SumOrdering):
+        return value.sum()
+    return None
+
+
+class _SumOrdering(ABC):
+    """Сравнения по сумме элементов, как у `CustomList`, с любым кастомным списком."""
+
+    __slots__ = ()
+
+    @abstractmethod
+    def sum(self) -> Number:
+        """Сумма элементов."""
+
+    def __eq__(self, __value: object) -> bool:
+        other = _sum_of(__value)
+        if other is None:
+            return NotImplemented
+        return isclose(self.sum(), other)
+
+    def __ne__(self, __value: object) -> bool:
+        result = self.__eq__(__value)
+        if result is not NotImplemented:
+            return not result
+        return NotImplemented
+
+    def __le__(self, __value: object) -> bool:
+        other = _sum_of(__value)
+        if other is None:
+            return NotImplemented
+        left = self.sum()
+        return left <= other or isclose(left, other)
+
+    def __lt__(self, __value: object) -> bool:
+        other = _sum_of(__value)
+        if other is None:
+            return NotImplemented
+        return self.sum() < other
+
+    def __ge__(self, __value: object) -> bool:
+        other = _sum_of(__value)
+        if other is None:
+            return NotImplemented
+        left = self.sum()
+        return left >= other or isclose(left, other)
+
+    def __gt__(self, __value: object) -> bool:
+        other = _sum_of(__value)
+        if other is None:
+            return NotImplemented
+        return self.sum() > other
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+def _as_array(values: Iterable[Number]) -> npt.NDArray[Any]:
+    """Одномерный массив чисел без копирования, если `values` -- уже массив."""
+    if isinstance(values, NumpyCustomList):
+        return values.array
+    if not hasattr(values, "__len__"):
+        values = list(values)
+    result = np.asarray(values)
+    if result.ndim != 1:
+        raise ValueError(f"Expected a 1-D sequence of numbers, got {result.ndim}-D.")
+    return result
+
+
+def _padded(
+    func: np.ufunc, left: npt.NDArray[Any], right: npt.NDArray[Any]
+) -> npt.NDArray[Any]:
+    """`func(left, right)` поэлементно, недостающие элементы считаются нулями."""
+    operands = [array for array in (left, right) if array.size] or [left]
+    result = np.zeros(max(left.size, right.size), dtype=np.result_type(*operands))
+    result[: left.size] = left
+    if right.size:
+        func(result[: right.size], right, out=result[: right.size])
+    return result
+
+
+class NumpyCustomList(_SumOrdering):
+    """`CustomList`, хранящий числа в одномерном массиве `numpy`.
+
+    Сложение/вычитание (в том числе с обычными списками и `CustomList`)
+    выполняются векторно, без построения кортежей на каждый элемент;
+    недостающие элементы меньшего операнда по-прежнему считаются нулями.
+    Массив создается из списка один раз, а обратно в список превращается
+    только по требованию (`tolist`, `__str__`, итерирование).
+    Нужен пакет `numpy`.
+
+    >>> NumpyCustomList([5, 1, 3, 7]) + CustomList([1, 2, 7])
+    NumpyCustomList([6, 3, 10, 7])
+    """
+
+    __slots__ = ("array",)
+
+    def __init__(self, values: Iterable[Number] = ()) -> None:
+        if np is None:
+            raise ModuleNotFoundError("Install `numpy` to use NumpyCustomList.")
+        self.array = _as_array(values)
+
+    def tolist(self) -> list[Number]:
+        """Элементы в виде обычного списка чисел Python."""
+        return self.array.tolist()
+
+    def sum(self) -> Number:
+        """Сумма элементов (число Python)."""
+        return self.array.sum().item()
+
+    def is_equal(self, other: object) -> bool:
+        """Поэлементное равенство, как у обычного списка."""
+        if not isinstance(other, NumpyCustomList | list):
+            return False
+        other_array = _as_array(other)
+        return self.array.shape == other_array.shape and bool(
+            np.all(self.array == other_array)
+        )
+
+    def __array__(
+        self, dtype: npt.DTypeLike | None = None, copy: bool | None = None
+    ) -> npt.NDArray[Any]:
+        if copy:
+            return np.array(self.array, dtype=dtype, copy=True)
+        return self.array if dtype is None else self.array.astype(dtype, copy=False)
+
+    def __len__(self) -> int:
+        return self.array.size
+
+    def __iter__(self) -> Iterator[Number]:
+        return iter(self.tolist())
+
+    @overload
+    def __getitem__(self, index: int) -> Number:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> NumpyCustomList:
+        ...
+
+    def __getitem__(self, index: int | slice) -> Number | NumpyCustomList:
+        if isinstance(index, slice):
+            return type(self)(self.array[index])
+        return self.array[index].item()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.tolist()})"
+
+    def __str__(self) -> str:
+        return f"data={self.tolist()}, sum={self.sum()}"
+
+    def __add__(self, right: Iterable[Number]) -> NumpyCustomList:
+        return type(self)(_padded(np.add, self.array, _as_array(right)))
+
+    def __radd__(self, left: Iterable[Number]) -> NumpyCustomList:
+        return type(self)(_padded(np.add, _as_array(left), self.array))
+
+    def __sub__(self, right: Iterable[Number]) -> NumpyCustomList:
+        return type(self)(_padded(np.subtract, self.array, _as_array(right)))
+
+    def __rsub__(self, left: Iterable[Number]) -> NumpyCustomList:
+        return type(self)(_padded(np.subtract, _as_array(left), self.array))
+
+
+def _typecode(values: Sequence[Number]) -> str:
+    """`"q"`, если `values` -- целые числа, иначе `"d"`."""
+    if isinstance(values, array):
+        return "d" if values.typecode in "fd" else "q"
+    return "q" if all(isinstance(value, int) for value in values) else "d"
+
+
+class ArrayCustomList(_SumOrdering, array):
+    """`CustomList`, хранящий числа подряд в `array.array` с типом `"q"` или `"d"`.
+
+    Элементы занимают по 8 байт вместо указателя на объект числа, а сам
+    список поддерживает buffer protocol, так что его можно без копирования
+    передать в `memoryview` или `numpy.asarray`. Сложение/вычитание
+    (с нулями вместо недостающих элементов), сравнения по сумме и `__str__`
+    работают так же, как у `CustomList`. Если `typecode` не задан, он
+    выбирается по элементам: `"q"` для целых, иначе `"d"`; результат
+    арифметики -- `"q"`, только если оба операнда целые. Целые числа, не
+    помещающиеся в 64 бита, вызывают `OverflowError`.
+
+    >>> ArrayCustomList([5, 1, 3, 7]) - [1, 2, 7]
+    ArrayCustomList([4, -1, -4, 7], typecode='q')
+    """
+
+    __slots__ = ()
+
+    def __new__(
+        cls, values: Iterable[Number] = (), typecode: str | None = None
+    ) -> ArrayCustomList:
+        if not isinstance(values, Sequence | array):
+            values = list(values)
+        if typecode is None:
+            typecode = _typecode(values)
+        if typecode not in ARRAY_TYPECODES:
+            raise ValueError(
+                f"Expected typecode {typecode!r} to be one of {ARRAY_TYPECODES}."
+            )
+        return super().__new__(cls, typecode, values)  # type: ignore[call-arg]
+
+    def __reduce_ex__(self, __protocol: SupportsIndex) -> tuple[Any, ...]:
+        return type(self), (array(self.typecode, self), self.typecode)
+
+    def __copy__(self) -> ArrayCustomList:
+        return type(self)(self, self.typecode)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> ArrayCustomList:
+        return type(self)(self, self.typecode)
+
+    def _padded(
+        self,
+        func: Callable[[Number, Number], Number],
+        left: Sequence[Number],
+        right: Sequence[Number],
+    ) -> ArrayCustomList:
+        """`func(left, right)` поэлементно, недостающие элементы считаются нулями."""
+        typecode = "q" if _typecode(left) == _typecode(right) == "q" else "d"
+        result = type(self)(array(typecode, map(func, left, right)), typecode)
+        common = len(result)
+        tail: Iterable[Number] = left[common:]
+        if len(right) > common:
+            tail = map(partial(func, 0), right[common:])
+        elif isinstance(tail, array) and tail.typecode != typecode:
+            tail = tail.tolist()  # ? `array.extend` takes only arrays of the same type
+        result.extend(tail)
+        return result
+
+    @staticmethod
+    def _as_sequence(values: Iterable[Number]) -> Sequence[Number]:
+        if isinstance(values, Sequence | array):
+            return values
+        return list(values)
+
+    def _inplace(
+        self, func: Callable[[Number, Number], Number], right: Iterable[Number]
+    ) -> ArrayCustomList:
+        """Как `CustomList._inplace`; целый список с дробным `right` -- новый `"d"`."""
+        values = self._as_sequence(right)
+        if self.typecode == "q" and _typecode(values) == "d":
+            return self._padded(func, self, values)
+        common = min(len(self), len(values))
+        tail = values[common:]
+        self[:common] = array(self.typecode, map(func, self, values))
+        self.extend(map(partial(func, 0), tail))
+        return self
+
+    def __iadd__(self, __value: Iterable[Number]) -> ArrayCustomList:  # type: ignore
+        return self._inplace(operator.add, __value)
+
+    def __isub__(self, __value: Iterable[Number]) -> ArrayCustomList:
+        return self._inplace(operator.sub, __value)
+
+    def sum(self) -> Number:
+        """Сумма элементов (число Python)."""
+        return sum(self)
+
+    def is_equal(self, other: object) -> bool:
+        """Поэлементное равенство, как у обычного списка."""
+        if isinstance(other, array):
+            return array.__eq__(self, other)
+        return isinstance(other, list) and self.tolist() == other
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.tolist()}, typecode={self.typecode!r})"
+
+    def __str__(self) -> str:
+        return f"data={self.tolist()}, sum={self.sum()}"
+
+    def __add__(self, right: Iterable[Number]) -> ArrayCustomList:  # type: ignore
+        return self._padded(operator.add, self, self._as_sequence(right))
+
+    def __radd__(self, left: Iterable[Number]) -> ArrayCustomList:
+        return self._padded(operator.add, self._as_sequence(left), self)
+
+    def __sub__(self, right: Iterable[Number]) -> ArrayCustomList:
+        return self._padded(operator.sub, self, self._as_sequence(right))
+
+    def __rsub__(self, left: Iterable[Number]) -> ArrayCustomList:
+        return self._padded(operator.sub, self._as_sequence(left), self)
+
+
+class LazyCustomList(_SumOrdering):
+    """Отложенная сумма/разность кастомных и обычных списков.
+
+    `LazyCustomList(a) + b - c + d` не создает промежуточных списков:
+    выражение запоминается как операнды со знаками (вложенные ленивые
+    выражения раскрываются), а результат -- `CustomList` с нулями вместо
+    недостающих элементов -- считается за один проход при первом обращении
+    к элементам, длине, `str` и т. п. и запоминается. До этого операнды
+    не копируются, так что их изменения попадут в результат. Выражения
+    делят список операндов с теми, из которых построены, так что цепочка
+    `expr = expr + v` строится за линейное от числа операндов время. Сравнения
+    по сумме не требуют вычисления: сумма выражения -- это сумма сумм
+    операндов с их знаками; она же остается суммой и после вычисления.
+
+    >>> expr = LazyCustomList([5, 1, 3, 7]) + CustomList([1, 2, 7]) - [1]
+    >>> expr == CustomList([25])
+    True
+    >>> expr
+    LazyCustomList([5, 3, 10, 7])
+    """
+
+    __slots__ = ("_terms", "_size", "_result")
+
+    def __init__(self, values: Iterable[Number] = ()) -> None:
+        self._terms: list[tuple[bool, Sequence[Number]]] = []  # (negative, operand)
+        self._size = 0  # ? the first `_size` terms are ours, the rest -- of longer ones
+        self._result: CustomList | None = None
+        self._append(values)
+
+    def _own_terms(self) -> Iterator[tuple[bool, Sequence[Number]]]:
+        return islice(self._terms, self._size)
+
+    def _append(self, values: Iterable[Number], negative: bool = False) -> None:
+        """Дописывает операнд в `self._terms`, который не продолжают другие."""
+        # pylint: disable=protected-access
+        if isinstance(values, LazyCustomList):
+            if values._result is not None:
+                self._terms.append((negative, values._result))
+            else:
+                terms = list(values._own_terms())  # ? `values` may share our list
+                self._terms.extend((neg != negative, v) for neg, v in terms)
+        elif isinstance(values, Sequence | array):
+            self._terms.append((negative, values))
+        else:
+            self._terms.append((negative, list(values)))
+        self._size = len(self._terms)
+
+    def _with(self, values: Iterable[Number], negative: bool) -> LazyCustomList:
+        """Новое выражение `self + values` (или `self - values`).
+
+        Продолжает список операндов `self`, не копируя его, если его еще
+        не продолжило другое выражение.
+        """
+        # pylint: disable=protected-access
+        result = type(self)()
+        if self._result is not None:
+            result._append(self._result)
+        elif len(self._terms) == self._size:
+            result._terms, result._size = self._terms, self._size
+        else:
+            result._terms, result._size = self._terms[: self._size], self._size
+        result._append(values, negative)
+        return result
+
+    def evaluate(self) -> CustomList:
+        """Значение выражения, посчитанное при первом вызове."""
+        if self._result is None:
+            terms = list(self._own_terms())
+            added = [values for negative, values in terms if not negative]
+            subtracted = [values for negative, values in terms if negative]
+            result: Iterable[Number] = map(sum, zip_longest(*added, fillvalue=0))
+            if subtracted:
+                subtrahend: Iterable[Number] = map(
+                    sum, zip_longest(*subtracted, fillvalue=0)
+                )
+                result = starmap(
+                    operator.sub, zip_longest(result, subtrahend, fillvalue=0)
+                )
+            total = self.sum()
+            self._result = CustomList(result)
+            # ? keep the sum seen before evaluation: float sums differ by order
+            self._result._sum = total  # pylint: disable=protected-access
+            self._terms, self._size = [], 0  # ? the operands are no longer needed
+        return self._result
+
+    def sum(self) -> Number:
+        """Сумма элементов; до вычисления -- по суммам операндов."""
+        if self._result is not None:
+            return self._result.sum()
+        total: Number = 0
+        for negative, values in self._own_terms():
+            values_sum = _sum_of(values)
+            if values_sum is None:
+                values_sum = sum(values)
+            total = total - values_sum if negative else total + values_sum
+        return total
+
+    def is_equal(self, other: object) -> bool:
+        """Поэлементное равенство результата, как у обычного списка."""
+        return self.evaluate().is_equal(other)
+
+    def __len__(self) -> int:
+        return len(self.evaluate())
+
+    def __iter__(self) -> Iterator[Number]:
+        return iter(self.evaluate())
+
+    def __getitem__(self, index: int) -> Number:
+        return self.evaluate()[index]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self.evaluate())})"
+
+    def __str__(self) -> str:
+        return str(self.evaluate())
+
+    def __add__(self, right: Iterable[Number]) -> LazyCustomList:
+        return self._with(right, negative=False)
+
+    def __radd__(self, left: Iterable[Number]) -> LazyCustomList:
+        return type(self)(left)._with(self, negative=False)
+
+    def __sub__(self, right: Iterable[Number]) -> LazyCustomList:
+        return self._with(right, negative=True)
+
+    def __rsub__(self, left: Iterable[Number]) -> LazyCustomList:
+        return type(self)(left)._with(self, negative=True)
+
+
+AnyCustomList: TypeAlias = (
+    CustomList | NumpyCustomList | ArrayCustomList | LazyCustomList
+)
+
+
+class SumSortedList:
+    """Кастомные списки, упорядоченные по сумме, как их сравнивает `CustomList`.
+
+    Сумма каждого списка берется один раз при добавлении (`CustomList.sum`
+    уже закеширована), поэтому списки нельзя изменять, пока они лежат
+    в коллекции, -- как ключи `dict`. Хранится как список отсортированных
+    корзин не длиннее `2 * load`: корзина ищется `bisect`'ом по максимумам
+    корзин, так что вставка и удаление -- O(log n) поисков и сдвиг внутри
+    одной корзины. Списки с равными суммами лежат в порядке добавления.
+
+    >>> ranked = SumSortedList([CustomList([5]), CustomList([1, 1]), CustomList([3])])
+    >>> ranked.top(2)
+    [[5], [3]]
+    >>> list(ranked.irange(2, 3))
+    [[1, 1], [3]]
+    """
+
+    __slots__ = ("_keys", "_items", "_maxes", "_load", "_len")
+
+    def __init__(self, lists: Iterable[AnyCustomList] = (), load: int = 1000) -> None:
+        if load <= 0:
+            raise ValueError(f"Expected load {load!r} to be positive.")
+        self._keys: list[list[Number]] = []
+        self._items: list[list[AnyCustomList]] = []
+        self._maxes: list[Number] = []  # ? the last key of every bucket
+        self._load = load
+        self._len = 0
+        self.update(lists)
+
+    @staticmethod
+    def _key(item: object) -> Number:
+        key = _sum_of(item)
+        if key is None:
+            raise TypeError(f"Expected a custom list, got {type(item)}.")
+        return key
+
+    def _split(self, pos: int) -> None:
+        """Делит переполненную корзину `pos` пополам."""
+        keys, items = self._keys[pos], self._items[pos]
+        half = len(keys) // 2
+        self._keys.insert(pos + 1, keys[half:])
+        self._items.insert(pos + 1, items[half:])
+        del keys[half:], items[half:]
+        self._maxes.insert(pos, keys[-1])
+
+    def add(self, item: AnyCustomList) -> None:
+        """Добавляет `item` после списков с такой же суммой."""
+        key = self._key(item)
+        if not self._maxes:
+            self._keys.append([key])
+            self._items.append([item])
+            self._maxes.append(key)
+        else:
+            pos = min(bisect_right(self._maxes, key), len(self._maxes) - 1)
+            keys = self._keys[pos]
+            index = bisect_right(keys, key)
+            keys.insert(index, key)
+            self._items[pos].insert(index, item)
+            self._maxes[pos] = keys[-1]
+            if len(keys) > 2 * self._load:
+                self._split(pos)
+        self._len += 1
+
+    def update(self, lists: Iterable[AnyCustomList]) -> None:
+        """Добавляет все `lists`; большие пачки -- одной сортировкой."""
+        lists = list(lists)
+        if len(lists) <= self._load:
+            for item in lists:
+                self.add(item)
+            return
+        pairs = [(self._key(item), item) for item in lists]
+        merged = sorted(
+            chain(zip(chain.from_iterable(self._keys), self, strict=True), pairs),
+            key=operator.itemgetter(0),
+        )
+        buckets = [
+            merged[i : i + self._load] for i in range(0, len(merged), self._load)
+        ]
+        self._keys = [[key for key, _ in bucket] for bucket in buckets]
+        self._items = [[item for _, item in bucket] for bucket in buckets]
+        self._maxes = [keys[-1] for keys in self._keys]
+        self._len = len(merged)
+
+    def _find(self, item: object) -> tuple[int, int]:
+        """Корзина и место в ней именно объекта `item` (не равного ему).
+
+        Ищет среди сумм, `isclose` к текущей сумме `item`: после вставки
+        она могла сдвинуться на ошибку округления.
+        """
+        key = self._key(item)
+        pos, start = self._first_close(key)
+        while pos < len(self._maxes):
+            keys, items = self._keys[pos], self._items[pos]
+            for index in range(start, len(keys)):
+                if keys[index] > key and not isclose(keys[index], key):
+                    raise ValueError(f"{item!r} is not in the SumSortedList.")
+                if items[index] is item:
+                    return pos, index
+            pos, start = pos + 1, 0
+        raise ValueError(f"{item!r} is not in the SumSortedList.")
+
+    def remove(self, item: AnyCustomList) -> None:
+        """Удаляет объект `item`, если его нет (или он изменился) -- `ValueError`."""
+        pos, index = self._find(item)
+        keys = self._keys[pos]
+        del keys[index], self._items[pos][index]
+        if keys:
+            self._maxes[pos] = keys[-1]
+        else:
+            del self._keys[pos], self._items[pos], self._maxes[pos]
+        self._len -= 1
+
+    def discard(self, item: AnyCustomList) -> None:
+        """Удаляет объект `item`, если он есть."""
+        try:
+            self.remove(item)
+        except ValueError:
+            pass
+
+    def _first_close(self, low: Number) -> tuple[int, int]:
+        """Корзина и место первой суммы, не меньшей `low` или `isclose` к ней."""
+        if not self._maxes:
+            return 0, 0
+        pos = min(bisect_left(self._maxes, low), len(self._maxes) - 1)
+        index = bisect_left(self._keys[pos], low)
+        while True:  # ? step back over the sums isclose to `low`
+            if index:
+                prev_pos, prev_index = pos, index - 1
+            elif pos:
+                prev_pos, prev_index = pos - 1, len(self._keys[pos - 1]) - 1
+            else:
+                return pos, index
+            if not isclose(self._keys[prev_pos][prev_index], low):
+                return pos, index
+            pos, index = prev_pos, prev_index
+
+    def irange(
+        self, low: Number | None = None, high: Number | None = None
+    ) -> Iterator[AnyCustomList]:
+        """Списки с суммой от `low` до `high` включительно, по возрастанию суммы.
+
+        Как в `CustomList.__le__`, суммы, `isclose` к границам, входят
+        в диапазон. `None` -- без ограничения с этой стороны.
+        """
+        pos, index = (0, 0) if low is None else self._first_close(low)
+        for keys, items in zip(self._keys[pos:], self._items[pos:], strict=True):
+            for key, item in zip(keys[index:], items[index:], strict=True):
+                if high is not None and key > high and not isclose(key, high):
+                    return
+                yield item
+            index = 0
+
+    def equal(self, value: AnyCustomList) -> list[AnyCustomList]:
+        """Списки, равные `value` в смысле `CustomList.__eq__`."""
+        key = self._key(value)
+        return list(self.irange(key, key))
+
+    def top(self, k: int) -> list[AnyCustomList]:
+        """`k` списков с наибольшими суммами, по убыванию суммы."""
+        return list(islice(reversed(self), k))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[AnyCustomList]:
+        return chain.from_iterable(self._items)
+
+    def __reversed__(self) -> Iterator[AnyCustomList]:
+        return chain.from_iterable(map(reversed, reversed(self._items)))
+
+    def __contains__(self, item: object) -> bool:
+        try:
+            self._find(item)
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+
+def _batched(iterable: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Нарезает `iterable` на списки по `size` элементов (последний -- короче)."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _as_sequences(lists: Iterable[Iterable[Number]]) -> Iterator[Sequence[Number]]:
+    for values in lists:
+        yield values if isinstance(values, Sequence | array) else list(values)
+
+
+def sum_lists(
+    lists: Iterable[Iterable[Number]],
+    processes: int | None = 0,
+    chunk_size: int = REDUCE_CHUNK_SIZE,
+) -> CustomList:
+    """Сумма `lists` с нулями вместо недостающих элементов.
+
+    Равна `sum(lists, CustomList())`, но без нового списка на каждое сложение:
+    списки прибавляются к одному результату через `CustomList.__iadd__`.
+    Если `processes` > 0, `lists` делятся на пачки по `chunk_size`, каждая
+    складывается в `ProcessPoolExecutor` на стольких процессах (в работе
+    не больше двух пачек на процесс), а частичные суммы складываются
+    по порядку пачек -- дерево с двумя уровнями. `processes=None` -- по числу
+    ядер. Выигрыш есть, только если сложение дороже пересылки списков
+    в процессы.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"Expected chunk_size {chunk_size!r} to be positive.")
+    total = CustomList()
+    if processes == 0:
+        for values in lists:
+            total += values
+        return total
+
+    chunks = _batched(_as_sequences(lists), chunk_size)
+    n_workers = processes or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=n_workers)
+    try:
+        pending: deque[Future[CustomList]] = deque()
+
+        def submit_next() -> None:
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.append(executor.submit(sum_lists, chunk))
+
+        for _ in range(2 * n_workers):
+            submit_next()
+        while pending:
+            future = pending.popleft()
+            submit_next()
+            total += future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return total
+
+
+def sum_arrays(
+    lists: Iterable[Iterable[Number]], batch_size: int = REDUCE_BATCH_SIZE
+) -> NumpyCustomList:
+    """Как `sum_lists`, но векторно на `numpy` (нужен пакет `numpy`).
+
+    Списки по `batch_size` штук копируются в строки двумерного массива,
+    дополненные нулями до самой длинной, и складываются `sum(axis=0)`.
+    Числа приводятся к общему типу `numpy` (`int64` или `float64`).
+    """
+    if np is None:
+        raise ModuleNotFoundError("Install `numpy` to use sum_arrays.")
+    if batch_size <= 0:
+        raise ValueError(f"Expected batch_size {batch_size!r} to be positive.")
+    total = _as_array(())
+    for batch in _batched(map(_as_array, lists), batch_size):
+        operands = [values for values in (total, *batch) if values.size] or [total]
+        padded = np.zeros(
+            (len(batch), max(values.size for values in batch)),
+            dtype=np.result_type(*operands),
+        )
+        for row, values in zip(padded, batch, strict=True):
+            row[: values.size] = values
+        total = _padded(np.add, total, padded.sum(axis=0))
+    return NumpyCustomList(total)
@@ -88,15 +88,29 @@ def test(c: Context, cov=False, missing=True):
     )
 
 
+@task
+def bench(c: Context, lists=2_000, length=2_000):
+    c.run(
+        f"{c.python_bin_path}python bench_custom_list.py"
+        f" --lists {lists} --length {length}",
+        pty=True,
+    )
+
+
 namespace = Collection(
     clean,
     lint,
     test,
     mypy,
+    bench,
 )
 namespace.configure(
     {
         "python_bin_path": get_python_bin_path(),
-        "lint_paths": ["custom_list.py", "test_custom_list.py"],
+        "lint_paths": [
+            "custom_list.py",
+            "test_custom_list.py",
+            "bench_custom_list.py",
+        ],
     }
 )
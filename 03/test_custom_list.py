@@ -1,11 +1,25 @@
 """Содержит тесты решения первого пункта домашнего задания #03."""
 # pylint: disable=missing-function-docstring, protected-access, missing-class-docstring
 # pylint: disable=invalid-name, eval-used, use-list-literal, unneeded-not
+import copy
+import pickle
+from collections.abc import Callable
+from math import nextafter
 from random import Random
 
 import pytest
 
-from custom_list import CustomList, Number
+from custom_list import (
+    AnyCustomList,
+    ArrayCustomList,
+    CustomList,
+    LazyCustomList,
+    Number,
+    NumpyCustomList,
+    SumSortedList,
+    sum_arrays,
+    sum_lists,
+)
 
 SEED: int | None = 999
 
@@ -465,3 +479,518 @@ class TestSpecialEqualityChecks:
         xs = rng.choices(range(1, 10**9), k=rng.randint(1, 10**5))
         assert CustomList(xs) > CustomList([])
         assert CustomList([]) < CustomList(xs)
+
+
+class TestSpecialIaddIsub:  # self += other, self -= other
+    @pytest.mark.parametrize("kind", [CustomList, ArrayCustomList])
+    def test_matches_add_sub(self, kind: type, xs: list[Number], ys: list[Number]):
+        added, subtracted = kind(xs), kind(xs)
+        ids = (id(added), id(subtracted))
+        right = list(ys)
+
+        added += right
+        subtracted -= (y for y in ys)
+
+        assert added.is_equal(list(CustomList(xs) + ys))
+        assert subtracted.is_equal(list(CustomList(xs) - ys))
+        assert (id(added), id(subtracted)) == ids
+        assert right == ys
+
+    def test_sum_updated(self):
+        nums = CustomList([1, 2])
+        nums += CustomList([10, 20, 30])
+        assert nums.sum() == sum([11, 22, 30])
+        nums -= [0.5]
+        assert nums.sum() == sum(nums) == sum([10.5, 22, 30])
+
+    @pytest.mark.parametrize("kind", [CustomList, ArrayCustomList])
+    def test_self(self, kind: type):
+        nums = kind([1, 2])
+        nums += nums
+        assert nums.is_equal([2, 4])
+        assert str(nums) == "data=[2, 4], sum=6"
+        nums -= nums
+        assert nums.is_equal([0, 0])
+
+    def test_accumulate(self):
+        rng = Random(SEED)
+        vectors = [
+            [rng.randint(-9, 9) for _ in range(rng.randrange(50))] for _ in range(200)
+        ]
+        total, expected = CustomList(), CustomList()
+        for vector in vectors:
+            total += vector
+            expected = expected + vector
+        assert total.is_equal(expected)
+        assert total.sum() == sum(expected)
+
+    def test_array_widens_to_float(self):
+        nums = ArrayCustomList([1, 2])
+        ints = nums
+        nums += [0.5]
+        assert nums.typecode == "d"
+        assert nums.is_equal([1.5, 2.0])
+        assert ints.is_equal([1, 2])
+
+
+class TestCachedSum:
+    @staticmethod
+    def mutate(nums: CustomList, rng: Random, make: Callable[[], Number]):
+        match rng.randrange(12):
+            case 0:
+                nums.append(make())
+            case 1:
+                nums.extend(make() for _ in range(rng.randrange(4)))
+            case 2:
+                nums.insert(rng.randint(-3, 3), make())
+            case 3 if nums:
+                nums.pop(rng.randrange(len(nums)))
+            case 4 if nums:
+                nums.remove(rng.choice(nums))
+            case 5 if nums:
+                nums[rng.randrange(len(nums))] = make()
+            case 6:
+                nums[1:3] = [make() for _ in range(rng.randrange(4))]
+            case 7:
+                del nums[::2]
+            case 8:
+                nums += [make()]
+            case 9:
+                nums *= rng.randrange(3)
+            case 10:
+                nums.reverse()
+            case _:
+                nums.sort()
+
+    @pytest.mark.parametrize("kind", [int, float])
+    def test_mutations(self, kind: type):
+        rng = Random(SEED)
+        make = {int: lambda: rng.randint(-100, 100), float: rng.random}[kind]
+        nums = CustomList([make() for _ in range(10)])
+        for _ in range(2_000):
+            self.mutate(nums, rng, make)
+            assert nums.sum() == sum(nums)
+            assert str(nums) == f"data={list(nums)}, sum={sum(nums)}"
+
+    def test_float_append_matches_sum(self):
+        nums = CustomList([1e16, 1.0])
+        assert nums.sum() == sum([1e16, 1.0])
+        nums.append(-1e16)
+        nums.extend([0.5])
+        assert nums.sum() == sum(nums)
+
+    def test_clear(self):
+        nums = CustomList([1.5, 2])
+        nums.clear()
+        assert nums.sum() == 0
+        nums.append(1)
+        assert nums == CustomList([1])
+
+    def test_comparisons_use_cache(self):
+        left, right = CustomList([1, 2, 3]), CustomList([7])
+        assert left < right
+        left.append(2)
+        assert left > right
+        assert left._sum == sum([1, 2, 3, 2])
+        assert right._sum == sum([7])
+
+    def test_invalid_mutations_keep_sum(self):
+        nums = CustomList([1, 2])
+        with pytest.raises(IndexError):
+            nums[5] = 10
+        with pytest.raises(ValueError, match="extended slice"):
+            nums[::2] = [1, 2]
+        with pytest.raises(ValueError, match="not in list"):
+            nums.remove(7)
+        assert nums.sum() == sum([1, 2])
+
+    @pytest.mark.parametrize("copier", [copy.copy, copy.deepcopy])
+    def test_copy(self, copier: Callable[[CustomList], CustomList]):
+        nums = CustomList([1, 2, 3])
+        assert nums.sum() == sum([1, 2, 3])
+        copied = copier(nums)
+        assert isinstance(copied, CustomList)
+        assert copied.is_equal(nums)
+        assert copied.sum() == sum([1, 2, 3])
+        assert str(copied) == "data=[1, 2, 3], sum=6"
+        assert copied == CustomList([6])
+        copied.append(1)
+        assert copied.sum() == sum([1, 2, 3, 1])
+        assert nums.sum() == sum([1, 2, 3])
+
+    def test_pickle(self):
+        nums = CustomList([1, 2.5])
+        assert nums.sum() == sum([1, 2.5])
+        restored = pickle.loads(pickle.dumps(nums))
+        assert restored.is_equal(nums)
+        restored.append(1)
+        assert restored.sum() == sum([1, 2.5, 1])
+
+
+class TestNumpyCustomList:
+    @pytest.fixture(autouse=True)
+    def _numpy(self):
+        pytest.importorskip("numpy")
+
+    def test_arithmetic_matches_custom_list(self, xs: list[Number], ys: list[Number]):
+        left, right = NumpyCustomList(xs), list(ys)
+        lists_before = (left.tolist(), list(right))
+
+        assert (left + right).is_equal(list(CustomList(xs) + ys))
+        assert (right + left).is_equal(list(ys + CustomList(xs)))
+        assert (left - right).is_equal(list(CustomList(xs) - ys))
+        assert (right - left).is_equal(list(ys - CustomList(xs)))
+        assert (left + NumpyCustomList(ys)).is_equal(list(CustomList(xs) + ys))
+        assert (left - CustomList(ys)).is_equal(list(CustomList(xs) - ys))
+
+        lists_after = (left.tolist(), list(right))
+        assert lists_before == lists_after
+
+    def test_large(self):
+        rng = Random(SEED)
+        xs = [rng.random() for _ in range(10**5)]
+        ys = [rng.random() for _ in range(10**5 // 2)]
+        result = NumpyCustomList(xs) - ys
+        assert result.tolist() == list(CustomList(xs) - ys)
+
+    def test_list_interface(self):
+        nums = NumpyCustomList([5.2, 4])
+        assert str(nums) == "data=[5.2, 4.0], sum=9.2"
+        assert str(NumpyCustomList([3, 2, 1])) == "data=[3, 2, 1], sum=6"
+        assert len(nums) == len([5.2, 4])
+        assert list(nums) == [5.2, 4.0]
+        assert nums[-1] == 4.0  # noqa: PLR2004
+        assert nums[:1].is_equal([5.2])
+        assert repr(NumpyCustomList([1]) + []) == "NumpyCustomList([1])"
+
+    def test_comparisons(self):
+        assert NumpyCustomList([5]) == NumpyCustomList([2, 3])
+        assert NumpyCustomList([5]) == CustomList([2, 3])
+        assert CustomList([2, 3]) == NumpyCustomList([5])
+        assert NumpyCustomList([0, -0.01]) < CustomList([0, 0, 0])
+        assert NumpyCustomList([5]) <= NumpyCustomList([2, 3])
+        assert NumpyCustomList([5.5]) >= NumpyCustomList([2, 3])
+        assert NumpyCustomList([5.5]) > CustomList([2, 3])
+        assert NumpyCustomList([1]) != NumpyCustomList([])
+        assert not NumpyCustomList([1]) == [1]
+
+    def test_zero_copy(self):
+        np = pytest.importorskip("numpy")
+        array = np.arange(4)
+        nums = NumpyCustomList(array)
+        assert np.asarray(nums) is array
+        assert np.shares_memory(nums[1:].array, array)
+
+    def test_array_copy_keeps_dtype(self):
+        np = pytest.importorskip("numpy")
+        nums = NumpyCustomList([1, 2, 3])
+        copied = np.array(nums)
+        assert copied.dtype == nums.array.dtype
+        assert not np.shares_memory(copied, nums.array)
+        assert np.array(nums, dtype=float).dtype == np.float64
+
+    def test_not_1d(self):
+        with pytest.raises(ValueError, match="1-D"):
+            NumpyCustomList([[1, 2]])  # type: ignore[list-item]
+
+
+class TestArrayCustomList:
+    def test_arithmetic_matches_custom_list(self, xs: list[Number], ys: list[Number]):
+        left, right = ArrayCustomList(xs), list(ys)
+        lists_before = (left.tolist(), list(right))
+
+        assert (left + right).is_equal(list(CustomList(xs) + ys))
+        assert (right + left).is_equal(list(ys + CustomList(xs)))
+        assert (left - right).is_equal(list(CustomList(xs) - ys))
+        assert (right - left).is_equal(list(ys - CustomList(xs)))
+        assert (left + ArrayCustomList(ys)).is_equal(list(CustomList(xs) + ys))
+        assert (left - CustomList(ys)).is_equal(list(CustomList(xs) - ys))
+        assert (left - (y for y in ys)).is_equal(list(CustomList(xs) - ys))
+
+        lists_after = (left.tolist(), list(right))
+        assert lists_before == lists_after
+
+    def test_typecodes(self):
+        ints, floats = ArrayCustomList([1, 2, 3]), ArrayCustomList([0.5])
+        assert (ints.typecode, floats.typecode) == ("q", "d")
+        assert (ints + ints).typecode == "q"
+        assert (floats - ints).is_equal([-0.5, -2, -3])
+        assert (ints - floats).is_equal([0.5, 2, 3])
+        assert ([1] - ints).typecode == "q"
+        assert ArrayCustomList([1], typecode="d").is_equal([1.0])
+        with pytest.raises(ValueError, match="typecode"):
+            ArrayCustomList([1], typecode="i")
+        with pytest.raises(OverflowError):
+            ArrayCustomList([2**63])
+
+    def test_list_interface(self):
+        nums = ArrayCustomList([5.2, 4])
+        assert str(nums) == "data=[5.2, 4.0], sum=9.2"
+        assert str(ArrayCustomList([3, 2, 1])) == "data=[3, 2, 1], sum=6"
+        assert str(ArrayCustomList()) == "data=[], sum=0"
+        assert repr(ArrayCustomList([1]) - []) == "ArrayCustomList([1], typecode='q')"
+        assert list(nums) == [5.2, 4.0]
+
+    def test_comparisons(self):
+        assert ArrayCustomList([5]) == ArrayCustomList([2, 3])
+        assert ArrayCustomList([5]) == CustomList([2, 3])
+        assert CustomList([2, 3]) == ArrayCustomList([5])
+        assert ArrayCustomList([0, -0.01]) < CustomList([0, 0, 0])
+        assert ArrayCustomList([5]) <= ArrayCustomList([2, 3])
+        assert ArrayCustomList([5.5]) >= ArrayCustomList([2, 3])
+        assert ArrayCustomList([5.5]) > CustomList([2, 3])
+        assert ArrayCustomList([1]) != ArrayCustomList([])
+        assert not ArrayCustomList([1]) == [1]
+        assert sorted([ArrayCustomList([3]), ArrayCustomList([1, 1])]) == [
+            ArrayCustomList([2]),
+            ArrayCustomList([3]),
+        ]
+
+    def test_buffer(self):
+        nums = ArrayCustomList([1.5, 2.5])
+        view = memoryview(nums)
+        assert (view.format, view.itemsize, view.tolist()) == ("d", 8, [1.5, 2.5])
+        view[0] = 10.0  # type: ignore[call-overload]
+        assert nums.is_equal([10.0, 2.5])
+
+    def test_numpy_zero_copy(self):
+        np = pytest.importorskip("numpy")
+        nums = ArrayCustomList([1, 2, 3])
+        array = np.asarray(nums)
+        assert array.dtype == np.int64
+        array[0] = 7
+        assert nums.is_equal([7, 2, 3])
+        assert NumpyCustomList(nums).is_equal([7, 2, 3])
+
+    def test_pickle(self):
+        nums = ArrayCustomList([1, 2])
+        restored = pickle.loads(pickle.dumps(nums))
+        assert isinstance(restored, ArrayCustomList)
+        assert restored.is_equal(nums)
+        assert restored.typecode == "q"
+
+    @pytest.mark.parametrize("copier", [copy.copy, copy.deepcopy])
+    def test_copy(self, copier: Callable[[ArrayCustomList], ArrayCustomList]):
+        nums = ArrayCustomList([1.5, 2], "d")
+        copied = copier(nums)
+        assert isinstance(copied, ArrayCustomList)
+        assert copied.typecode == "d"
+        assert copied.is_equal(nums)
+        copied.append(1)
+        assert list(nums) == [1.5, 2]
+
+
+class TestLazyCustomList:
+    def test_sum_is_stable(self):
+        expr = LazyCustomList([0.1, 0.7]) + [0.2, 0.3] - [0.3]
+        before = expr.sum()
+        assert expr.evaluate().sum() == before
+        assert expr.sum() == before
+        assert str(expr).endswith(f"sum={before}")
+
+    def test_chain_matches_custom_list(self, xs: list[Number], ys: list[Number]):
+        zs = [1, -2, 3.5]
+        expr = LazyCustomList(xs) + CustomList(ys) - zs + (y for y in ys)
+        expected = CustomList(xs) + CustomList(ys) - zs + ys
+        assert expr.is_equal(list(expected))
+        assert (ys - LazyCustomList(xs)).is_equal(list(ys - CustomList(xs)))
+        assert (ys + LazyCustomList(xs)).is_equal(list(ys + CustomList(xs)))
+
+    def test_nested(self):
+        left = LazyCustomList([1, 2]) - [10]
+        right = LazyCustomList([100]) - [0, 1000, 1]
+        assert (left - right).is_equal([-109, 1002, 1])
+        assert ([5] - (left + right)).is_equal([-86, 998, 1])
+        assert left.is_equal([-9, 2])
+        assert (left + right).is_equal([91, -998, -1])
+
+    def test_lazy_until_used(self):
+        right = CustomList([1, 2])
+        expr = LazyCustomList([1]) + right - [5]
+        assert expr._result is None
+        assert expr == CustomList([-1])
+        assert expr > CustomList([-2]) > expr - [2]
+        assert expr._result is None
+
+        right.append(3)
+        assert str(expr) == "data=[-3, 2, 3], sum=2"
+        assert expr._result is not None
+        right.append(4)
+        assert len(expr) == len([-3, 2, 3])
+        assert expr[-1] == 3  # noqa: PLR2004
+        assert list(expr) == [-3, 2, 3]
+        assert repr(expr) == "LazyCustomList([-3, 2, 3])"
+        assert expr.sum() == sum([-3, 2, 3])
+
+    def test_empty(self):
+        assert LazyCustomList().is_equal([])
+        assert (LazyCustomList() - []).is_equal([])
+        assert LazyCustomList() == CustomList()
+
+    def test_shared_terms(self):
+        base = LazyCustomList([1, 1]) + [2]
+        left = base + [10]
+        right = base - [5, 5, 5]
+        assert left._terms is base._terms
+        assert right._terms is not base._terms
+        assert (left + left).is_equal([26, 2])
+        assert left.is_equal([13, 1])
+        assert right.is_equal([-2, -4, -5])
+        assert base.is_equal([3, 1])
+        assert base.sum() == sum([1, 1, 2])
+
+    def test_long_chain(self):
+        rng = Random(SEED)
+        vectors = [
+            [rng.randint(-9, 9) for _ in range(rng.randrange(50))] for _ in range(100)
+        ]
+        expr, expected = LazyCustomList(), CustomList()
+        for index, vector in enumerate(vectors):
+            if index % 3:
+                expr, expected = expr + vector, expected + vector
+            else:
+                expr, expected = expr - vector, expected - vector
+        assert expr.is_equal(list(expected))
+
+
+class TestSumSortedList:
+    @staticmethod
+    def check(ranked: SumSortedList, expected: list[CustomList]):
+        assert len(ranked) == len(expected)
+        assert [nums.sum() for nums in ranked] == sorted(n.sum() for n in expected)
+        assert sorted(map(id, ranked)) == sorted(map(id, expected))
+
+    @pytest.mark.parametrize("load", [1, 3, 1000])
+    def test_add_remove(self, load: int):
+        rng = Random(SEED)
+        ranked, expected = SumSortedList(load=load), list[CustomList]()
+        for _ in range(1_000):
+            if expected and rng.random() < 0.4:  # noqa: PLR2004
+                nums = expected.pop(rng.randrange(len(expected)))
+                ranked.remove(nums)
+            else:
+                nums = CustomList(rng.choices(range(-5, 6), k=rng.randrange(4)))
+                ranked.add(nums)
+                expected.append(nums)
+            assert (nums in ranked) == any(n is nums for n in expected)
+        self.check(ranked, expected)
+
+    def test_update(self):
+        rng = Random(SEED)
+        lists = [CustomList([rng.randint(-50, 50)]) for _ in range(100)]
+        ranked = SumSortedList(lists[:10], load=4)
+        ranked.update(lists[10:])
+        self.check(ranked, lists)
+        ranked.add(lists[0])
+        self.check(ranked, lists + [lists[0]])
+
+    def test_stable_ties(self):
+        first, second, third = CustomList([2]), CustomList([1, 1]), CustomList([2.0])
+        ranked = SumSortedList([first, second], load=1)
+        ranked.add(third)
+        assert [id(nums) for nums in ranked] == [id(first), id(second), id(third)]
+        ranked.remove(second)
+        assert [id(nums) for nums in ranked] == [id(first), id(third)]
+
+    def test_remove_missing(self):
+        nums = CustomList([1])
+        ranked = SumSortedList([nums])
+        with pytest.raises(ValueError, match="not in"):
+            ranked.remove(CustomList([1]))
+        nums.append(1)
+        with pytest.raises(ValueError, match="not in"):
+            ranked.remove(nums)
+        ranked.discard(nums)
+        assert len(ranked) == 1
+        assert [1] not in ranked
+        with pytest.raises(TypeError, match="custom list"):
+            ranked.add([1])  # type: ignore[arg-type]
+
+    @pytest.mark.parametrize("load", [1, 2, 1000])
+    def test_remove_after_rounding_drift(self, load: int):
+        lazy = LazyCustomList([0.1, 0.7]) + [0.2, 0.3] - [0.3]
+        drifting = CustomList([1.1])
+        others = [CustomList([x]) for x in (0.5, 1, 1.0, 1.1, 2)]
+        ranked = SumSortedList([*others, lazy, drifting], load=load)
+        lazy.evaluate()
+        drifting[0] = nextafter(1.1, 2)  # ? one ulp, as a rounding error would
+        moved: list[AnyCustomList] = [lazy, drifting]
+        for nums in moved:
+            assert nums in ranked
+            ranked.remove(nums)
+            assert nums not in ranked
+        self.check(ranked, others)
+
+    @pytest.mark.parametrize("load", [1, 2, 1000])
+    def test_irange(self, load: int):
+        sums = [-3, 0.3, 0.1 + 0.2, 0.30000001, 1, 2, 2, 5]
+        ranked = SumSortedList(reversed([CustomList([x]) for x in sums]), load=load)
+        assert [n.sum() for n in ranked.irange(0.3, 2)] == sums[1:-1]
+        assert [n.sum() for n in ranked.irange(0.1 + 0.2, 1)] == sums[1:5]
+        assert [n.sum() for n in ranked.irange(high=0.3)] == sums[:3]
+        assert [n.sum() for n in ranked.irange(low=2)] == [2, 2, 5]
+        assert not list(ranked.irange(6))
+        assert not list(ranked.irange(1.5, 1.9))
+        assert [n.sum() for n in ranked.equal(CustomList([0.1, 0.2]))] == sums[1:3]
+
+    def test_top(self):
+        lists = [CustomList([x, 1]) for x in (4, -1, 9, 3)]
+        ranked = SumSortedList(lists, load=1)
+        assert ranked.top(2) == [CustomList([10]), CustomList([5])]
+        assert [n.sum() for n in ranked.top(10)] == [10, 5, 4, 0]
+        assert not ranked.top(0)
+        assert repr(SumSortedList([CustomList([1])])) == "SumSortedList([[1]])"
+
+    def test_mixed_kinds(self):
+        ranked = SumSortedList(
+            [CustomList([3]), ArrayCustomList([1.5]), LazyCustomList([2]) + [0]]
+        )
+        assert [n.sum() for n in ranked] == [1.5, 2, 3]
+
+    def test_sums_are_cached(self):
+        class CountingList(CustomList):
+            calls = 0
+
+            def sum(self) -> Number:
+                CountingList.calls += 1
+                return super().sum()
+
+        lists = [CountingList([x]) for x in range(50)]
+        ranked = SumSortedList(lists, load=4)
+        list(ranked.irange(10, 20))
+        ranked.top(5)
+        ranked.remove(lists[7])
+        assert CountingList.calls == len(lists) + 1
+
+
+class TestSumLists:
+    @pytest.fixture(name="lists")
+    def random_lists(self) -> list[list[Number]]:
+        rng = Random(SEED)
+        return [
+            [rng.randint(-99, 99) for _ in range(rng.randrange(40))] for _ in range(300)
+        ]
+
+    @pytest.mark.parametrize("processes", [0, 2])
+    def test_matches_fold(self, lists: list[list[Number]], processes: int):
+        lists_before = [list(values) for values in lists]
+        expected = sum(lists, CustomList())
+        result = sum_lists(iter(lists), processes=processes, chunk_size=7)
+        assert result.is_equal(list(expected))
+        assert result.sum() == sum(sum(values) for values in lists)
+        assert lists == lists_before
+
+    def test_mixed_inputs(self):
+        lists = [CustomList([1, 2]), ArrayCustomList([0.5]), (x for x in [1, 1, 1])]
+        assert sum_lists(lists, processes=1).is_equal([2.5, 3, 1])
+        assert sum_lists([]).is_equal([])
+        with pytest.raises(ValueError, match="chunk_size"):
+            sum_lists([], chunk_size=0)
+
+    def test_sum_arrays(self, lists: list[list[Number]]):
+        pytest.importorskip("numpy")
+        expected = sum(lists, CustomList())
+        assert sum_arrays(lists, batch_size=16).is_equal(list(expected))
+        assert sum_arrays([[1], [0.5, 2]]).is_equal([1.5, 2.0])
+        assert sum_arrays([[], [1, 2]]).tolist() == [1, 2]
+        assert sum_arrays([]).is_equal([])